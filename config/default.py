@@ -4,10 +4,15 @@ import os
 # Flask Configuration
 SECRET_KEY = 'mycobot-web-controller-secret-change-in-production'
 DEBUG = True
+MAX_CONTENT_LENGTH = 1_000_000  # Bytes, larger request bodies are rejected with 413 before parsing
 
 # Robot Configuration
 ROBOT_PORT = "/dev/ttyAMA0"
 ROBOT_BAUDRATE = 115200
+ROBOT_LOW_LATENCY = True  # Set ASYNC_LOW_LATENCY on the serial port (TIOCSSERIAL)
+JOG_FLUSH_INTERVAL = 0.025  # Minimum seconds between coalesced jog commands
+ANGLE_CACHE_TTL = 0.08  # Seconds a serial angle reading is reused by status requests
+IDEAL_ANGLES_FRESH_TTL = 0.2  # Seconds after a move/read that get_current returns ideal angles without serial I/O
 
 # File Paths
 BASE_DIR = '/home/er/lsh'
@@ -15,12 +20,19 @@ POSITIONS_FILE = os.path.join(BASE_DIR, 'saved_positions.json')
 CONFIG_FILE = os.path.join(BASE_DIR, 'position_config.json')
 PROCEDURES_FILE = os.path.join(BASE_DIR, 'saved_procedures.json')
 VIDEOS_DIR = os.path.join(BASE_DIR, 'videos')
+MAX_PROCEDURE_STEPS = 500  # Upper bound on steps accepted for a saved procedure
+LOG_PROCEDURE_STEPS = True  # Print each step as a procedure runs
 
 # Camera Configuration
 CAMERA_DEVICE = '/dev/video0'
 CAMERA_WIDTH = 640
 CAMERA_HEIGHT = 480
 CAMERA_FPS = 30
+CAMERA_NATIVE_MJPEG = True  # Request MJPEG from the device and stream it without re-encoding
+STREAM_FPS = 15  # MJPEG stream rate, capture decodes at most this often unless recording
+STREAM_JPEG_QUALITY = 72  # Re-encoded stream frames; halves size vs. the libjpeg default of 95
+SCREENSHOT_JPEG_QUALITY = 90
+CAMERA_IDLE_TIMEOUT = 10.0  # Seconds capture keeps running with no stream viewer and no recording
 
 # Video Recording
 VIDEO_CODEC = 'mp4v'
@@ -44,4 +56,12 @@ HOST = '0.0.0.0'
 PORT = 5000
 
 # SocketIO Configuration
-CORS_ALLOWED_ORIGINS = "*"
\ No newline at end of file
+CORS_ALLOWED_ORIGINS = "*"
+# Robot and camera I/O are blocking calls run from native threads, so stay on the
+# threading driver; simple-websocket gives it a real websocket transport instead
+# of falling back to long-polling
+SOCKETIO_ASYNC_MODE = 'threading'
+STATUS_PUSH_INTERVAL = 0.1  # Minimum seconds between state-change status_update broadcasts
+
+# Binary telemetry websocket (/ws/telemetry) poll rate
+TELEMETRY_HZ = 50
\ No newline at end of file
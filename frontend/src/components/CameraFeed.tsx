@@ -129,20 +129,18 @@ export function CameraFeed() {
 
   const takeScreenshot = async () => {
     try {
-      const response = await fetch('/api/camera/screenshot', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' }
-      });
-      const data = await response.json();
+      const response = await fetch('/api/camera/screenshot.jpg');
       
-      if (data.success) {
+      if (response.ok) {
         // Create download link
+        const url = URL.createObjectURL(await response.blob());
         const link = document.createElement('a');
-        link.href = data.image;
+        link.href = url;
         link.download = `screenshot_${new Date().toISOString().replace(/[:.]/g, '-')}.jpg`;
         document.body.appendChild(link);
         link.click();
         document.body.removeChild(link);
+        URL.revokeObjectURL(url);
         
         // Refresh video stream to prevent freezing
         setTimeout(() => {
@@ -151,6 +149,7 @@ export function CameraFeed() {
         
         console.log('Screenshot captured and downloaded');
       } else {
+        const data = await response.json();
         console.error('Screenshot failed:', data.message);
       }
     } catch (error) {
@@ -6,82 +6,197 @@ import cv2
 import numpy as np
 import sys
 
+# Quick check works on a grayscale QUICK_CHECK_SIZE thumbnail. Area averaging
+# can only shrink differences, so the thumbnail's mean absolute difference is a
+# lower bound on the full-size one, and MSE >= (mean absolute difference)^2.
+# A thumbnail difference above sqrt(threshold_mse) therefore proves the full
+# check would say "not frozen"; the margin covers uint8 rounding in the resize.
+QUICK_CHECK_SIZE = (80, 60)
+QUICK_ROUNDING_MARGIN = 1.0
+
+def load_camera_regions(image1_path, image2_path):
+    """
+    Load two screenshots and crop out the camera feed region
+    Returns (camera1, camera2) or None if either image could not be loaded
+    """
+    # Read images
+    img1 = cv2.imread(image1_path)
+    img2 = cv2.imread(image2_path)
+    
+    if img1 is None or img2 is None:
+        return None
+    
+    # Resize images to same size if different
+    if img1.shape != img2.shape:
+        img2 = cv2.resize(img2, (img1.shape[1], img1.shape[0]))
+    
+    # Extract just the camera feed region (right side of the image)
+    # Based on the screenshots, the camera feed is in the right third of the image
+    height, width = img1.shape[:2]
+    camera_x_start = int(width * 0.67)  # Start from 67% across the image
+    
+    return img1[:, camera_x_start:], img2[:, camera_x_start:]
+
+def quick_frozen_check(camera1, camera2, threshold_mse=100, threshold_diff_percent=5):
+    """
+    Cheap tiered freeze check on the camera regions, using the same thresholds as the full check
+    Returns True/False only when it agrees with the full check, None when full metrics are needed
+    """
+    # Byte-identical frames are the common frozen case: zero MSE, no changed
+    # pixels and identical histograms pass any positive thresholds
+    if np.array_equal(camera1, camera2):
+        return threshold_mse > 0 and threshold_diff_percent > 0
+    
+    # Compare gray like the full check does
+    gray1 = cv2.cvtColor(camera1, cv2.COLOR_BGR2GRAY)
+    gray2 = cv2.cvtColor(camera2, cv2.COLOR_BGR2GRAY)
+    small1 = cv2.resize(gray1, QUICK_CHECK_SIZE, interpolation=cv2.INTER_AREA)
+    small2 = cv2.resize(gray2, QUICK_CHECK_SIZE, interpolation=cv2.INTER_AREA)
+    mean_diff = cv2.norm(small1, small2, cv2.NORM_L1) / small1.size
+    
+    # Small thumbnail differences prove nothing (a changed patch averages away),
+    # so only the "moving" answer can be taken from here
+    if mean_diff > np.sqrt(threshold_mse) + QUICK_ROUNDING_MARGIN:
+        return False
+    return None
+
 def calculate_image_difference(image1_path, image2_path):
     """
     Calculate difference between two images using multiple methods
     Returns a dictionary with different difference metrics
     """
     try:
-        # Read images
-        img1 = cv2.imread(image1_path)
-        img2 = cv2.imread(image2_path)
-        
-        if img1 is None or img2 is None:
+        regions = load_camera_regions(image1_path, image2_path)
+        if regions is None:
             return {"error": "Could not load one or both images"}
         
-        # Resize images to same size if different
-        if img1.shape != img2.shape:
-            img2 = cv2.resize(img2, (img1.shape[1], img1.shape[0]))
-        
-        # Extract just the camera feed region (right side of the image)
-        # Based on the screenshots, the camera feed is in the right third of the image
-        height, width = img1.shape[:2]
-        camera_x_start = int(width * 0.67)  # Start from 67% across the image
-        
-        camera1 = img1[:, camera_x_start:]
-        camera2 = img2[:, camera_x_start:]
-        
-        # Convert to grayscale for comparison
-        gray1 = cv2.cvtColor(camera1, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(camera2, cv2.COLOR_BGR2GRAY)
-        
-        # Method 1: Mean Squared Error (MSE)
-        mse = np.mean((gray1 - gray2) ** 2)
-        
-        # Method 2: Structural Similarity Index (SSIM)
-        # Simple correlation coefficient as SSIM approximation
-        mean1, mean2 = np.mean(gray1), np.mean(gray2)
-        std1, std2 = np.std(gray1), np.std(gray2)
-        correlation = np.mean((gray1 - mean1) * (gray2 - mean2)) / (std1 * std2) if std1 * std2 > 0 else 0
-        
-        # Method 3: Histogram comparison
-        hist1 = cv2.calcHist([gray1], [0], None, [256], [0, 256])
-        hist2 = cv2.calcHist([gray2], [0], None, [256], [0, 256])
-        hist_correlation = cv2.compareHist(hist1, hist2, cv2.HISTCMP_CORREL)
-        
-        # Method 4: Number of different pixels (above threshold)
-        diff_pixels = np.sum(np.abs(gray1.astype(int) - gray2.astype(int)) > 30)
-        total_pixels = gray1.shape[0] * gray1.shape[1]
-        diff_percentage = (diff_pixels / total_pixels) * 100
-        
-        # Check if images are black/empty
-        mean_brightness1 = np.mean(gray1)
-        mean_brightness2 = np.mean(gray2)
-        is_black1 = mean_brightness1 < 20  # Very dark
-        is_black2 = mean_brightness2 < 20
-        
-        return {
-            "mse": float(mse),
-            "correlation": float(correlation),
-            "hist_correlation": float(hist_correlation), 
-            "diff_pixels_percent": float(diff_percentage),
-            "total_pixels": int(total_pixels),
-            "different_pixels": int(diff_pixels),
-            "mean_brightness1": float(mean_brightness1),
-            "mean_brightness2": float(mean_brightness2),
-            "is_black1": bool(is_black1),
-            "is_black2": bool(is_black2)
-        }
+        return compare_camera_regions(*regions)
         
     except Exception as e:
         return {"error": str(e)}
 
+class ImageDiffer:
+    """
+    Computes difference metrics between camera regions, reusing scratch
+    buffers across calls so a freeze watchdog loop doesn't churn the allocator
+    """
+    
+    def __init__(self):
+        self._shape = None
+        self._hist1 = np.empty((256, 1), dtype=np.float32)
+        self._hist2 = np.empty((256, 1), dtype=np.float32)
+    
+    def _ensure_buffers(self, shape):
+        """Size the scratch buffers for a region of the given (height, width)"""
+        if shape == self._shape:
+            return
+        
+        height, width = shape
+        self._gray1 = np.empty(shape, dtype=np.uint8)
+        self._gray2 = np.empty(shape, dtype=np.uint8)
+        self._diff = np.empty(shape, dtype=np.uint8)
+        self._changed = np.empty(shape, dtype=np.uint8)
+        self._small_size = (max(1, width // 4), max(1, height // 4))
+        self._small1 = np.empty(self._small_size[::-1], dtype=np.uint8)
+        self._small2 = np.empty(self._small_size[::-1], dtype=np.uint8)
+        self._shape = shape
+    
+    def compare(self, camera1, camera2):
+        """
+        Calculate difference metrics between two cropped camera regions
+        Returns a dictionary with different difference metrics
+        """
+        try:
+            self._ensure_buffers(camera1.shape[:2])
+            gray1, gray2, diff = self._gray1, self._gray2, self._diff
+            
+            # Convert to grayscale for comparison
+            cv2.cvtColor(camera1, cv2.COLOR_BGR2GRAY, dst=gray1)
+            cv2.cvtColor(camera2, cv2.COLOR_BGR2GRAY, dst=gray2)
+            
+            # Saturating uint8 difference, shared by MSE and the pixel count below
+            cv2.absdiff(gray1, gray2, dst=diff)
+            total_pixels = diff.size
+            
+            # Method 1: Mean Squared Error (MSE)
+            mse = cv2.norm(diff, cv2.NORM_L2SQR) / total_pixels
+            
+            # Method 2: Structural Similarity Index (SSIM)
+            # Simple correlation coefficient as SSIM approximation, computed on a
+            # quarter-scale copy since it only needs to be roughly right
+            mean1, std1 = (v[0][0] for v in cv2.meanStdDev(gray1))
+            mean2, std2 = (v[0][0] for v in cv2.meanStdDev(gray2))
+            if std1 * std2 > 0:
+                cv2.resize(gray1, self._small_size, dst=self._small1, interpolation=cv2.INTER_AREA)
+                cv2.resize(gray2, self._small_size, dst=self._small2, interpolation=cv2.INTER_AREA)
+                correlation = cv2.matchTemplate(self._small1, self._small2, cv2.TM_CCOEFF_NORMED)[0][0]
+            else:
+                correlation = 0
+            
+            # Method 3: Histogram comparison
+            cv2.calcHist([gray1], [0], None, [256], [0, 256], hist=self._hist1, accumulate=False)
+            cv2.calcHist([gray2], [0], None, [256], [0, 256], hist=self._hist2, accumulate=False)
+            hist_correlation = cv2.compareHist(self._hist1, self._hist2, cv2.HISTCMP_CORREL)
+            
+            # Method 4: Number of different pixels (above threshold)
+            cv2.threshold(diff, 30, 255, cv2.THRESH_BINARY, dst=self._changed)
+            diff_pixels = cv2.countNonZero(self._changed)
+            diff_percentage = (diff_pixels / total_pixels) * 100
+            
+            # Check if images are black/empty
+            mean_brightness1 = mean1
+            mean_brightness2 = mean2
+            is_black1 = mean_brightness1 < 20  # Very dark
+            is_black2 = mean_brightness2 < 20
+            
+            return {
+                "mse": float(mse),
+                "correlation": float(correlation),
+                "hist_correlation": float(hist_correlation), 
+                "diff_pixels_percent": float(diff_percentage),
+                "total_pixels": int(total_pixels),
+                "different_pixels": int(diff_pixels),
+                "mean_brightness1": float(mean_brightness1),
+                "mean_brightness2": float(mean_brightness2),
+                "is_black1": bool(is_black1),
+                "is_black2": bool(is_black2)
+            }
+            
+        except Exception as e:
+            return {"error": str(e)}
+
+# Shared instance backing the module-level helpers
+_differ = ImageDiffer()
+
+def compare_camera_regions(camera1, camera2):
+    """
+    Calculate difference metrics between two cropped camera regions
+    Returns a dictionary with different difference metrics
+    """
+    return _differ.compare(camera1, camera2)
+
 def is_camera_frozen(before_image, after_image, threshold_mse=100, threshold_diff_percent=5):
     """
     Determine if camera is frozen based on image comparison
     Returns True if frozen, False if not frozen
     """
-    diff_metrics = calculate_image_difference(before_image, after_image)
+    try:
+        regions = load_camera_regions(before_image, after_image)
+    except Exception as e:
+        print(f"Error comparing images: {e}")
+        return None
+    
+    if regions is None:
+        print("Error comparing images: Could not load one or both images")
+        return None
+    
+    # Skip the full metrics when the thumbnails already settle it
+    quick_result = quick_frozen_check(*regions, threshold_mse, threshold_diff_percent)
+    if quick_result is not None:
+        print(f"Quick check decided: camera frozen: {quick_result}")
+        return quick_result
+    
+    diff_metrics = compare_camera_regions(*regions)
     
     if "error" in diff_metrics:
         print(f"Error comparing images: {diff_metrics['error']}")
@@ -1,5 +1,8 @@
 from pymycobot import MyCobot320
+import os
+import threading
 import time
+import numpy as np
 from rich.console import Console
 from rich.table import Table
 from rich.prompt import Prompt
@@ -8,8 +11,29 @@ import keyboard
 # Initialize Rich Console
 console = Console()
 
+def tune_serial_port(mc, path):
+    """Put the robot's serial port in low-latency mode (set LSH_SERIAL_LOW_LATENCY=0 to skip)"""
+    if os.getenv('LSH_SERIAL_LOW_LATENCY', '1') == '0':
+        return
+
+    # Kernel tty side: deliver replies as soon as they arrive (ASYNC_LOW_LATENCY)
+    try:
+        mc._serial_port.set_low_latency_mode(True)
+    except (AttributeError, IOError, ValueError) as e:
+        console.print(f"[yellow]Low-latency serial mode unavailable: {e}[/yellow]")
+
+    # USB-serial adapters also hold replies for latency_timer ms (16 by default)
+    timer_path = f"/sys/bus/usb-serial/devices/{os.path.basename(path)}/latency_timer"
+    if os.path.exists(timer_path):
+        try:
+            with open(timer_path, 'w') as f:
+                f.write('1')
+        except OSError as e:
+            console.print(f"[yellow]Could not lower USB latency timer: {e}[/yellow]")
+
 # Initialize MyCobot320
 mc = MyCobot320("/dev/ttyAMA0", 115200)
+tune_serial_port(mc, "/dev/ttyAMA0")
 
 # Global variable to store recorded choreography
 recorded_moves = []
@@ -24,12 +48,12 @@ ANGLE_LIMITS = [
     (-180, 180),  # Joint 6
 ]
 
+# Limits as arrays so clamping is a single vectorized np.clip
+_ANGLE_MIN = np.array([lo for lo, _ in ANGLE_LIMITS], dtype=np.float64)
+_ANGLE_MAX = np.array([hi for _, hi in ANGLE_LIMITS], dtype=np.float64)
+
 def clamp_angles(angles):
-    clamped = []
-    for i, angle in enumerate(angles):
-        min_a, max_a = ANGLE_LIMITS[i]
-        clamped.append(max(min(angle, max_a), min_a))
-    return clamped
+    return np.clip(np.asarray(angles, dtype=np.float64), _ANGLE_MIN, _ANGLE_MAX).tolist()
 
 
 
@@ -52,48 +76,40 @@ def home():
 def extend():
     mc.send_angles([0, 0, 0, 0, 0, 0], 100)
 
+# Wave direction per joint: joints 1 and 3 swing one way, joint 2 the other
+_WAVE_SIGNS = np.array([1, -1, 1, 0, 0, 0], dtype=np.float64)
+
 def wave():
-    angles = mc.get_angles()
+    start = np.asarray(mc.get_angles(), dtype=np.float64)
     move_size = 30
-    for i in range(3):
-        if i % 2 == 0:
-            angles[i] += move_size
-        else:
-            angles[i] -= move_size
-    mc.send_angles(angles, 100)
-    time.sleep(0.6)
-    for i in range(3):
-        if i % 2 == 0:
-            angles[i] -= move_size * 2
-        else:
-            angles[i] += move_size * 2
-    mc.send_angles(angles, 100)
-    time.sleep(0.6)
-    for i in range(3):
-        if i % 2 == 0:
-            angles[i] += move_size
-        else:
-            angles[i] -= move_size
-    mc.send_angles(angles, 100)
-    time.sleep(0.6)
+    offset = _WAVE_SIGNS * move_size
+    # Out, back past the start, and home again - all three waypoints built and
+    # clamped in one vectorized pass before any serial traffic
+    waypoints = clamp_angles(start + np.outer([1, -1, 0], offset))
+    for waypoint in waypoints:
+        mc.send_angles(waypoint, 100)
+        time.sleep(0.6)
 
 def record_choreography():
     global recorded_moves
     recorded_moves = []
     console.print("[bold blue]Recording choreography... Press Enter to record a position, and type 'q' then Enter to finish.[/bold blue]")
     
-    mc.power_off()
+    # Keep the arm powered but limp for the whole session: encoders stay readable
+    # with the servos released, so each pose is one get_angles() instead of a power cycle
+    mc.power_on()
+    mc.release_all_servos()
     try:
         while True:
             user_input = input("Press Enter to record position or 'q' to finish: ")
             if user_input.lower() == 'q':
                 console.print("[bold cyan]Recording complete![/bold cyan]")
                 break
-            mc.power_on()
-            time.sleep(0.1)
             angles = mc.get_angles()
+            if not isinstance(angles, list) or len(angles) != 6:
+                console.print("[bold red]Failed to read angles, try again.[/bold red]")
+                continue
             recorded_moves.append(clamp_angles(angles))
-            mc.power_off()
             console.print(f"[bold green]Recorded: {angles}[/bold green]")
     finally:
         mc.power_on()
@@ -107,17 +123,20 @@ def mouse_jiggler():
     input("Press Enter to start...")
     moves = record_choreography()
     
-    console.print("[bold cyan]Jiggling started! Press any key to stop.[/bold cyan]")
+    console.print("[bold cyan]Jiggling started! Press 'q' to stop.[/bold cyan]")
+    # The hotkey callback wakes the wait below immediately instead of being polled
+    stop_event = threading.Event()
+    hotkey = keyboard.add_hotkey("q", stop_event.set)
     mc.power_on()
     try:
-        while True:
-            if keyboard.is_pressed("q"):
-                console.print("[bold red]Jiggling stopped![/bold red]")
-                break
+        while not stop_event.is_set():
             for angles in moves:
                 mc.send_angles(angles, 100)
-                time.sleep(1)
+                if stop_event.wait(1):
+                    break
+        console.print("[bold red]Jiggling stopped![/bold red]")
     finally:
+        keyboard.remove_hotkey(hotkey)
         mc.power_off()
 
 def play_choreography():
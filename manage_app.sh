@@ -5,7 +5,7 @@
 
 APP_SESSION="mycobot-app"
 APP_DIR="/home/er/lsh"
-APP_COMMAND="python app.py"
+APP_COMMAND="${APP_COMMAND:-python app.py}"
 
 case "$1" in
     start)
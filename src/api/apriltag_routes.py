@@ -1,12 +1,14 @@
 """AprilTag detection API routes"""
 import cv2
 import numpy as np
-from flask import Blueprint, jsonify, request, Response
+from flask import Blueprint, current_app, jsonify, request, Response
 from io import BytesIO
 import base64
+from typing import Dict, List, Optional, Tuple
 
-from ..services.apriltag_service import apriltag_service
-from ..services.camera_service import camera_service
+from .decorators import with_json
+from ..services.apriltag_service import apriltag_service, apriltag_broadcaster
+from ..services.camera_service import camera_service, SCREENSHOT_JPEG_PARAMS
 
 apriltag_bp = Blueprint('apriltag', __name__)
 
@@ -14,44 +16,66 @@ apriltag_bp = Blueprint('apriltag', __name__)
 def detect_apriltags():
     """Detect AprilTags in current camera frame"""
     try:
-        # Get current frame from camera service
-        if camera_service._last_frame is None:
-            return jsonify({'success': False, 'message': 'No camera frame available'})
+        # Read before detecting: if the parameters change meanwhile, the ETag is
+        # older than the detections and the next poll just refetches
+        params_version = apriltag_service.params_version
         
-        frame = camera_service._last_frame.copy()
+        # Detection runs at most once per camera frame; repeat polls are a cache read
+        detections, frame_id = apriltag_broadcaster.current_detections()
+        if detections is None:
+            return jsonify({'success': False, 'message': 'No camera frame available'})
         
-        # Detect AprilTags
-        detections = apriltag_service.detect_tags(frame)
+        # Let pollers skip the body when neither the frame nor the tag size,
+        # decimation or focal length has changed
+        etag = f'{frame_id}-{params_version}'
+        if etag in request.if_none_match:
+            return Response(status=304, headers={'ETag': f'"{etag}"'})
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'detections': detections,
-            'count': len(detections)
+            'count': len(detections),
+            'frame_id': frame_id
         })
+        response.set_etag(etag)
+        return response
         
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+def _annotated_jpeg() -> Optional[Tuple[bytes, List[Dict]]]:
+    """Annotated JPEG and detections for the current frame, or None if there is no frame"""
+    # Reuse the stream's annotated JPEG when it is already up to date for this frame
+    cached = apriltag_broadcaster.latest_for(camera_service.frame_seq)
+    if cached is not None:
+        return cached
+    
+    # Get current frame from camera service
+    frame, gray = camera_service.read_latest_pair()
+    if frame is None:
+        return None
+    
+    # Detect AprilTags
+    detections = apriltag_service.detect_tags(gray)
+    
+    # Draw detections on a copy of the frame
+    annotated_image = apriltag_service.draw_detections(frame, detections)
+    
+    # Encode image as JPEG
+    ret, buffer = cv2.imencode('.jpg', annotated_image, SCREENSHOT_JPEG_PARAMS)
+    if not ret:
+        raise RuntimeError('Failed to encode image')
+    
+    return buffer.tobytes(), detections
+
 @apriltag_bp.route('/api/apriltag/image')
 def get_apriltag_image():
-    """Get camera image with AprilTag detections overlaid"""
+    """Get camera image with AprilTag detections overlaid, as a base64 data URL (legacy)"""
     try:
-        # Get current frame from camera service
-        if camera_service._last_frame is None:
+        result = _annotated_jpeg()
+        if result is None:
             return jsonify({'success': False, 'message': 'No camera frame available'})
-        
-        frame = camera_service._last_frame.copy()
-        
-        # Detect AprilTags
-        detections = apriltag_service.detect_tags(frame)
-        
-        # Draw detections on image
-        annotated_image = apriltag_service.draw_detections(frame, detections)
-        
-        # Encode image as JPEG
-        ret, buffer = cv2.imencode('.jpg', annotated_image, [cv2.IMWRITE_JPEG_QUALITY, 90])
-        if not ret:
-            return jsonify({'success': False, 'message': 'Failed to encode image'})
+        buffer, detections = result
         
         # Convert to base64
         img_base64 = base64.b64encode(buffer).decode('utf-8')
@@ -66,20 +90,32 @@ def get_apriltag_image():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+@apriltag_bp.route('/api/apriltag/image.jpg')
+def get_apriltag_image_jpeg():
+    """Get camera image with AprilTag detections overlaid as a raw JPEG
+    
+    Detections are returned as JSON in the X-Apriltag-Detections header.
+    """
+    try:
+        result = _annotated_jpeg()
+        if result is None:
+            return jsonify({'success': False, 'message': 'No camera frame available'}), 404
+        jpeg, detections = result
+        
+        return Response(jpeg, mimetype='image/jpeg', headers={
+            'Cache-Control': 'no-store',
+            'X-Apriltag-Detections': current_app.json.dumps(detections),
+            'X-Apriltag-Count': str(len(detections))
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @apriltag_bp.route('/api/apriltag/config', methods=['GET'])
 def get_apriltag_config():
     """Get current AprilTag detection configuration"""
     try:
-        config = {
-            'tag_size_meters': apriltag_service.tag_size_meters,
-            'tag_size_mm': apriltag_service.tag_size_meters * 1000,
-            'camera_resolution': {
-                'width': apriltag_service.image_width,
-                'height': apriltag_service.image_height
-            },
-            'focal_length': apriltag_service.focal_length,
-            'camera_matrix': apriltag_service.camera_matrix.tolist()
-        }
+        config = apriltag_service.get_config()
         
         return jsonify({
             'success': True,
@@ -90,20 +126,30 @@ def get_apriltag_config():
         return jsonify({'success': False, 'message': str(e)})
 
 @apriltag_bp.route('/api/apriltag/config', methods=['POST'])
-def update_apriltag_config():
+@with_json
+def update_apriltag_config(data):
     """Update AprilTag detection configuration"""
     try:
-        data = request.json or {}
         
         # Update tag size if provided
         if 'tag_size_mm' in data:
             tag_size_mm = float(data['tag_size_mm'])
             apriltag_service.update_tag_size(tag_size_mm / 1000.0)  # Convert to meters
         
+        # Update detector decimation if provided
+        if 'quad_decimate' in data:
+            apriltag_service.update_quad_decimate(float(data['quad_decimate']))
+        
+        # Update detection downscale if provided
+        if 'detect_scale' in data:
+            apriltag_service.update_detect_scale(float(data['detect_scale']))
+        
         return jsonify({
             'success': True,
             'message': 'Configuration updated',
-            'tag_size_mm': apriltag_service.tag_size_meters * 1000
+            'tag_size_mm': apriltag_service.tag_size_meters * 1000,
+            'quad_decimate': apriltag_service.quad_decimate,
+            'detect_scale': apriltag_service.detect_scale
         })
         
     except Exception as e:
@@ -114,50 +160,43 @@ def apriltag_stream():
     """Video stream with AprilTag detection overlay"""
     
     def generate():
+        # Detection runs once per frame in the shared broadcaster; each client
+        # just forwards the latest annotated JPEG
+        apriltag_broadcaster.subscribe()
+        frame_id = 0
         try:
             while True:
-                # Get current frame from camera service
-                if camera_service._last_frame is None:
+                frame_id, part = apriltag_broadcaster.wait_for_frame(frame_id)
+                if part is None:
                     continue
-                    
-                frame = camera_service._last_frame.copy()
-                
-                # Detect AprilTags
-                detections = apriltag_service.detect_tags(frame)
                 
-                # Draw detections on image
-                annotated_image = apriltag_service.draw_detections(frame, detections)
-                
-                # Encode frame for streaming
-                ret, buffer = cv2.imencode('.jpg', annotated_image, [cv2.IMWRITE_JPEG_QUALITY, 70])
-                if ret:
-                    frame_bytes = buffer.tobytes()
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+                yield part
                            
+        except GeneratorExit:
+            print("Client disconnected from AprilTag stream")
         except Exception as e:
             print(f"AprilTag stream error: {e}")
+        finally:
+            apriltag_broadcaster.unsubscribe()
     
     return Response(generate(),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @apriltag_bp.route('/api/apriltag/calibrate', methods=['POST'])
-def calibrate_distance():
+@with_json
+def calibrate_distance(data):
     """Calibrate distance measurement using known distance"""
     try:
-        data = request.json or {}
         actual_distance_cm = data.get('actual_distance_cm')
         
         if not actual_distance_cm:
             return jsonify({'success': False, 'message': 'actual_distance_cm required'})
         
         # Get current detections
-        if camera_service._last_frame is None:
+        detections, _ = apriltag_broadcaster.current_detections()
+        if detections is None:
             return jsonify({'success': False, 'message': 'No camera frame available'})
         
-        frame = camera_service._last_frame.copy()
-        detections = apriltag_service.detect_tags(frame)
-        
         if not detections:
             return jsonify({'success': False, 'message': 'No AprilTags detected for calibration'})
         
@@ -169,21 +208,15 @@ def calibrate_distance():
         if measured_distance_cm > 0:
             correction_factor = actual_distance_cm / measured_distance_cm
             
-            # Update focal length based on correction
-            apriltag_service.focal_length *= correction_factor
-            apriltag_service.fx = apriltag_service.focal_length
-            apriltag_service.fy = apriltag_service.focal_length
-            
-            # Update camera matrix
-            apriltag_service.camera_matrix[0, 0] = apriltag_service.fx
-            apriltag_service.camera_matrix[1, 1] = apriltag_service.fy
+            # Update focal length and camera matrix based on correction
+            old_focal_length, new_focal_length = apriltag_service.scale_focal_length(correction_factor)
             
             return jsonify({
                 'success': True,
                 'message': 'Distance calibrated',
                 'correction_factor': correction_factor,
-                'old_focal_length': apriltag_service.focal_length / correction_factor,
-                'new_focal_length': apriltag_service.focal_length,
+                'old_focal_length': old_focal_length,
+                'new_focal_length': new_focal_length,
                 'measured_distance_cm': measured_distance_cm,
                 'actual_distance_cm': actual_distance_cm
             })
@@ -1,6 +1,6 @@
 """Camera and video recording API routes"""
 import os
-from flask import Blueprint, jsonify, Response, send_file
+from flask import Blueprint, jsonify, request, Response, send_file
 
 from ..services.camera_service import camera_service
 
@@ -52,6 +52,24 @@ def take_screenshot():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+@camera_bp.route('/api/camera/screenshot.jpg')
+def screenshot_jpeg():
+    """Take a screenshot and return the JPEG directly (optional ?quality=1-100)"""
+    try:
+        quality = request.args.get('quality', type=int)
+        if quality is not None and not 1 <= quality <= 100:
+            return jsonify({'success': False, 'message': 'quality must be between 1 and 100'}), 400
+        
+        jpeg = camera_service.take_screenshot_jpeg(quality)
+        
+        if jpeg is None:
+            return jsonify({'success': False, 'message': 'Failed to capture screenshot'}), 404
+        
+        return Response(jpeg, mimetype='image/jpeg', headers={'Cache-Control': 'no-store'})
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @camera_bp.route('/api/video/start', methods=['POST'])
 def start_video_recording():
     """Start video recording"""
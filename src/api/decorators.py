@@ -0,0 +1,18 @@
+"""Shared decorators for API routes"""
+from functools import wraps
+
+from flask import request
+
+def with_json(view):
+    """Parse the JSON body once and pass it to the view as its first argument
+    
+    A missing or malformed body, or JSON that is not an object, becomes an
+    empty dict, so views can read fields with data.get() without their own guard.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            data = {}
+        return view(data, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,43 @@
+"""Shared worker pool for long-running robot jobs started from API routes"""
+import queue
+import threading
+from typing import Callable, List
+
+class BackgroundExecutor:
+    """Fixed pool of reusable daemon worker threads
+    
+    concurrent.futures.ThreadPoolExecutor joins its workers at interpreter exit,
+    which would hang shutdown behind an endless jiggle loop, so jobs run on
+    daemon threads fed from a queue instead.
+    """
+    
+    def __init__(self, max_workers: int, thread_name_prefix: str):
+        self._max_workers = max_workers
+        self._thread_name_prefix = thread_name_prefix
+        self._jobs: queue.SimpleQueue = queue.SimpleQueue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+    
+    def submit(self, fn: Callable, *args, **kwargs):
+        """Queue fn to run on a worker, starting one if the pool isn't full yet"""
+        self._jobs.put((fn, args, kwargs))
+        with self._lock:
+            if len(self._threads) < self._max_workers:
+                thread = threading.Thread(target=self._worker, daemon=True,
+                                          name=f'{self._thread_name_prefix}_{len(self._threads)}')
+                self._threads.append(thread)
+                thread.start()
+    
+    def _worker(self):
+        """Run queued jobs forever"""
+        while True:
+            fn, args, kwargs = self._jobs.get()
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                print(f"Background job {getattr(fn, '__name__', fn)} failed: {e}")
+
+# Procedures, choreography playback and jiggling all drive the arm, and routes
+# only submit after claiming the robot, so one long-lived worker runs them in
+# order; a job submitted as the previous one releases the robot just queues
+background_executor = BackgroundExecutor(max_workers=1, thread_name_prefix='robot-bg')
@@ -1,6 +1,7 @@
 """Position management API routes"""
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, jsonify
 
+from .decorators import with_json
 from ..services.position_service import position_service
 from ..services.robot_controller import robot_controller
 from ..models.robot_state import robot_state
@@ -21,10 +22,10 @@ def get_positions():
         return jsonify({'success': False, 'message': str(e)})
 
 @position_bp.route('/api/positions/save', methods=['POST'])
-def save_position():
+@with_json
+def save_position(data):
     """Save current robot position with a name"""
     try:
-        data = request.json or {}
         name = data.get('name', '').strip()
         
         if not name:
@@ -34,7 +35,7 @@ def save_position():
         if not robot_controller.ensure_powered():
             return jsonify({'success': False, 'message': 'Robot not powered'})
         
-        current_angles = robot_controller.get_angles()
+        current_angles = robot_controller.get_angles(max_age=0)
         if current_angles is None:
             return jsonify({'success': False, 'message': 'Failed to read current position'})
         
@@ -53,10 +54,10 @@ def save_position():
         return jsonify({'success': False, 'message': f'Failed to save position: {str(e)}'})
 
 @position_bp.route('/api/positions/delete', methods=['POST'])
-def delete_position():
+@with_json
+def delete_position(data):
     """Delete a saved position"""
     try:
-        data = request.json or {}
         name = data.get('name', '').strip()
         
         if not name:
@@ -72,10 +73,10 @@ def delete_position():
         return jsonify({'success': False, 'message': f'Failed to delete position: {str(e)}'})
 
 @position_bp.route('/api/positions/update_config', methods=['POST'])
-def update_position_config():
+@with_json
+def update_position_config(data):
     """Update position configuration (enabled/disabled for command center)"""
     try:
-        data = request.json or {}
         name = data.get('name', '').strip()
         enabled = data.get('enabled', True)
         
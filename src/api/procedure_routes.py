@@ -1,15 +1,60 @@
 """Procedure management API routes"""
-import threading
 import time
-from flask import Blueprint, request, jsonify
+from typing import Any, Dict, List
+from flask import Blueprint, jsonify
 
+from .decorators import with_json
+from .executors import background_executor
+from .responses import constant_json
 from ..services.procedure_service import procedure_service
 from ..services.position_service import position_service
 from ..services.robot_controller import robot_controller
 from ..models.robot_state import robot_state
+from ..utils.config import MAX_PROCEDURE_STEPS, LOG_PROCEDURE_STEPS
 
 procedure_bp = Blueprint('procedure', __name__)
 
+_PROCEDURE_STOPPED = constant_json({'success': True, 'message': 'Procedure execution stopped'})
+
+def _invalid_position_steps(steps: list) -> List[Dict[str, Any]]:
+    """Return every step that references a missing position, in step order"""
+    position_steps = [(i, step.get('data')) for i, step in enumerate(steps)
+                      if isinstance(step, dict) and step.get('type') == 'position']
+    
+    # One set difference against the store instead of a lookup per step
+    missing = position_service.missing_positions(name for _, name in position_steps)
+    if not missing:
+        return []
+    return [{'step': i + 1, 'position': name} for i, name in position_steps if name in missing]
+
+def _invalid_steps_response(invalid: List[Dict[str, Any]]):
+    """Error response naming the first invalid step and listing all of them"""
+    first = invalid[0]
+    message = f'Step {first["step"]}: Position "{first["position"]}" does not exist'
+    if len(invalid) > 1:
+        message += f' (+{len(invalid) - 1} more)'
+    return jsonify({'success': False, 'message': message, 'invalid_steps': invalid})
+
+def _validate_procedure_request(name: str, steps: list):
+    """Checks shared by save and update - returns an error response, or None if valid
+    
+    Step structure (types, delays) is validated by the procedure service itself.
+    """
+    if not name:
+        return jsonify({'success': False, 'message': 'Procedure name is required'})
+    
+    if not steps:
+        return jsonify({'success': False, 'message': 'Procedure must have at least one step'})
+    
+    if len(steps) > MAX_PROCEDURE_STEPS:
+        return jsonify({'success': False, 'message': f'Procedure cannot have more than {MAX_PROCEDURE_STEPS} steps'})
+    
+    # Validate that all position steps reference existing positions
+    invalid = _invalid_position_steps(steps)
+    if invalid:
+        return _invalid_steps_response(invalid)
+    return None
+
 @procedure_bp.route('/api/procedures', methods=['GET'])
 def get_procedures():
     """Get all saved procedures"""
@@ -23,29 +68,17 @@ def get_procedures():
         return jsonify({'success': False, 'message': str(e)})
 
 @procedure_bp.route('/api/procedures/save', methods=['POST'])
-def save_procedure():
+@with_json
+def save_procedure(data):
     """Save a new procedure"""
     try:
-        data = request.json or {}
         name = data.get('name', '').strip()
         steps = data.get('steps', [])
         description = data.get('description', '')
         
-        if not name:
-            return jsonify({'success': False, 'message': 'Procedure name is required'})
-        
-        if not steps:
-            return jsonify({'success': False, 'message': 'Procedure must have at least one step'})
-        
-        # Validate that all position steps reference existing positions
-        for i, step in enumerate(steps):
-            if step.get('type') == 'position':
-                position_name = step.get('data')
-                if not position_service.position_exists(position_name):
-                    return jsonify({
-                        'success': False, 
-                        'message': f'Step {i+1}: Position "{position_name}" does not exist'
-                    })
+        error = _validate_procedure_request(name, steps)
+        if error:
+            return error
         
         procedure_service.save_procedure(name, steps, description)
         
@@ -60,10 +93,10 @@ def save_procedure():
         return jsonify({'success': False, 'message': f'Failed to save procedure: {str(e)}'})
 
 @procedure_bp.route('/api/procedures/delete', methods=['POST'])
-def delete_procedure():
+@with_json
+def delete_procedure(data):
     """Delete a saved procedure"""
     try:
-        data = request.json or {}
         name = data.get('name', '').strip()
         
         if not name:
@@ -79,29 +112,17 @@ def delete_procedure():
         return jsonify({'success': False, 'message': f'Failed to delete procedure: {str(e)}'})
 
 @procedure_bp.route('/api/procedures/update', methods=['POST'])
-def update_procedure():
+@with_json
+def update_procedure(data):
     """Update an existing procedure"""
     try:
-        data = request.json or {}
         name = data.get('name', '').strip()
         steps = data.get('steps', [])
         description = data.get('description', '')
         
-        if not name:
-            return jsonify({'success': False, 'message': 'Procedure name is required'})
-        
-        if not steps:
-            return jsonify({'success': False, 'message': 'Procedure must have at least one step'})
-        
-        # Validate that all position steps reference existing positions
-        for i, step in enumerate(steps):
-            if step.get('type') == 'position':
-                position_name = step.get('data')
-                if not position_service.position_exists(position_name):
-                    return jsonify({
-                        'success': False, 
-                        'message': f'Step {i+1}: Position "{position_name}" does not exist'
-                    })
+        error = _validate_procedure_request(name, steps)
+        if error:
+            return error
         
         procedure_service.update_procedure(name, steps, description)
         
@@ -123,19 +144,28 @@ def execute_procedure(procedure_name):
         if not procedure:
             return jsonify({'success': False, 'message': f'Procedure "{procedure_name}" not found'})
         
-        if robot_state.is_busy():
+        # Claim the robot atomically so concurrent requests can't both start a procedure
+        if not robot_state.try_start_playing():
             return jsonify({'success': False, 'message': 'Robot is currently busy with another operation'})
         
         if not robot_controller.ensure_powered():
+            robot_state.set_playing_state(False)
             return jsonify({'success': False, 'message': 'Robot not powered'})
         
         # Execute procedure in background thread
         def execute_steps():
-            robot_state.set_playing_state(True)
             try:
                 steps = procedure['steps']
+                # Resolve every referenced position up front rather than once per step
+                positions = position_service.get_positions(
+                    step['data'] for step in steps if step['type'] == 'position')
+                stop_event = robot_state.play_stopped
+                stopped = stop_event.is_set
+                # Step timings are scheduled against a running deadline, so time spent
+                # sending commands is absorbed instead of stretching the procedure
+                deadline = time.monotonic()
                 for i, step in enumerate(steps):
-                    if not robot_state.is_playing:  # Check if execution was stopped
+                    if stopped():  # Check if execution was stopped
                         break
                     
                     step_type = step['type']
@@ -143,24 +173,31 @@ def execute_procedure(procedure_name):
                     
                     if step_type == 'position':
                         # Get position data
-                        position_data = position_service.get_position(step_data)
+                        position_data = positions.get(step_data)
                         if position_data:
-                            print(f"Procedure {procedure_name}: Moving to position {step_data}")
+                            if LOG_PROCEDURE_STEPS:
+                                print(f"Procedure {procedure_name}: Moving to position {step_data}")
                             robot_controller.send_angles(position_data['angles'], 80)
-                            time.sleep(2)  # Wait for movement to complete
+                            # Wait for movement to complete, returning at once if stopped
+                            deadline += 2
+                            if stop_event.wait(max(0.0, deadline - time.monotonic())):
+                                break
                         else:
                             print(f"Procedure {procedure_name}: Position {step_data} not found, skipping")
                     
                     elif step_type == 'delay':
-                        print(f"Procedure {procedure_name}: Waiting {step_data} seconds")
-                        time.sleep(step_data)
+                        if LOG_PROCEDURE_STEPS:
+                            print(f"Procedure {procedure_name}: Waiting {step_data} seconds")
+                        deadline += step_data
+                        if stop_event.wait(max(0.0, deadline - time.monotonic())):
+                            break
                 
             except Exception as e:
                 print(f"Error executing procedure {procedure_name}: {e}")
             finally:
                 robot_state.set_playing_state(False)
         
-        threading.Thread(target=execute_steps, daemon=True).start()
+        background_executor.submit(execute_steps)
         
         return jsonify({
             'success': True,
@@ -173,5 +210,6 @@ def execute_procedure(procedure_name):
 @procedure_bp.route('/api/procedures/stop', methods=['POST'])
 def stop_procedure():
     """Stop procedure execution"""
-    robot_state.set_playing_state(False)
-    return jsonify({'success': True, 'message': 'Procedure execution stopped'})
\ No newline at end of file
+    # The running job releases the playing claim when it exits
+    robot_state.request_stop_playing()
+    return _PROCEDURE_STOPPED()
\ No newline at end of file
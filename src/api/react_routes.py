@@ -1,19 +1,24 @@
 """Routes for serving React app"""
 import os
-from flask import Blueprint, send_from_directory, send_file
+from flask import Blueprint, send_from_directory
 
 react_bp = Blueprint('react', __name__)
 
 # Path to React build directory
 REACT_BUILD_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'static', 'react-build')
+REACT_ASSETS_DIR = os.path.join(REACT_BUILD_PATH, 'assets')
+
+# Bundles under assets/ have content hashes in their names, so they never change
+# in place and can be cached for a year; index.html must always be revalidated
+ASSET_MAX_AGE = 31536000
 
 @react_bp.route('/')
 @react_bp.route('/robot')  # React route
 def serve_react():
     """Serve React app"""
-    return send_file(os.path.join(REACT_BUILD_PATH, 'index.html'))
+    return send_from_directory(REACT_BUILD_PATH, 'index.html', max_age=0, conditional=True)
 
 @react_bp.route('/assets/<path:filename>')
 def serve_react_assets(filename):
     """Serve React static assets"""
-    return send_from_directory(os.path.join(REACT_BUILD_PATH, 'assets'), filename)
\ No newline at end of file
+    return send_from_directory(REACT_ASSETS_DIR, filename, max_age=ASSET_MAX_AGE, conditional=True)
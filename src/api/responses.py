@@ -0,0 +1,40 @@
+"""Prebuilt JSON responses for endpoints whose reply never changes"""
+import json
+from typing import Any, Callable, Dict
+
+from flask import Response, jsonify, request
+from werkzeug.exceptions import HTTPException
+
+def constant_json(payload: Dict[str, Any]) -> Callable[[], Response]:
+    """Encode payload once and return a factory for responses carrying it
+    
+    Each call builds a fresh Response around the shared body, since Response
+    objects are mutable and can't be handed to several requests at once.
+    Clients that send "Prefer: return=minimal" get an empty 204 instead.
+    """
+    body = json.dumps(payload, separators=(',', ':')).encode() + b'\n'
+    
+    def make_response() -> Response:
+        if _prefers_minimal():
+            return Response(status=204)
+        return Response(body, mimetype='application/json')
+    return make_response
+
+def _prefers_minimal() -> bool:
+    """Whether the client asked for no response body (RFC 7240)"""
+    prefer = request.headers.get('Prefer', '')
+    return 'return=minimal' in prefer.replace(' ', '').lower()
+
+def install_json_error_handlers(blueprint):
+    """Answer exceptions raised by the blueprint's views with the usual JSON envelope
+    
+    Views can then let errors propagate instead of wrapping their bodies in
+    try/except. ValueError is treated as bad input (400), HTTP errors keep
+    their own status, anything else is a 500.
+    """
+    @blueprint.errorhandler(Exception)
+    def handle_exception(e):
+        if isinstance(e, HTTPException):
+            return jsonify({'success': False, 'message': e.description}), e.code
+        status = 400 if isinstance(e, ValueError) else 500
+        return jsonify({'success': False, 'message': str(e)}), status
@@ -0,0 +1,70 @@
+"""Binary telemetry websocket for high-rate joint state streaming"""
+import struct
+import time
+from flask import Blueprint, Response, jsonify, request
+from simple_websocket import Server, ConnectionClosed
+
+from ..models.robot_state import robot_state
+from ..utils.config import TELEMETRY_HZ
+
+telemetry_bp = Blueprint('telemetry', __name__)
+
+# 6 joint angles (float32) + is_recording, is_playing, is_jiggling, is_recording_video
+TELEMETRY_FRAME = struct.Struct('<6f4B')
+
+def pack_telemetry() -> bytes:
+    """Pack the current robot state into a 28-byte telemetry frame"""
+    return TELEMETRY_FRAME.pack(
+        *robot_state.get_ideal_angles(),
+        robot_state.is_recording,
+        robot_state.is_playing,
+        robot_state.is_jiggling,
+        robot_state.is_recording_video
+    )
+
+class _WebSocketResponse(Response):
+    """Response returned once the websocket closes - the socket is already gone,
+    so stop the WSGI server from writing an HTTP response onto it
+    
+    Each server needs a different signal for that (same branches as flask-sock).
+    """
+    
+    def __init__(self, mode: str):
+        super().__init__()
+        self._ws_mode = mode
+    
+    def __call__(self, *args, **kwargs):
+        if self._ws_mode == 'gunicorn':
+            # gunicorn's sync/gthread workers treat StopIteration as "already handled"
+            raise StopIteration()
+        if self._ws_mode == 'werkzeug':
+            # The dev server drops the connection quietly on ConnectionError
+            raise ConnectionError()
+        return []
+
+@telemetry_bp.route('/ws/telemetry')
+def telemetry():
+    """Push packed state frames over a plain websocket (binaryType='arraybuffer')
+    
+    Only changed frames are sent, polled at TELEMETRY_HZ. Reads the ideal state
+    only, so it never touches the serial port.
+    """
+    # A plain GET has no socket to take over; answer it instead of crashing in Server()
+    if request.environ.get('HTTP_UPGRADE', '').lower() != 'websocket':
+        return jsonify({'success': False, 'message': 'Websocket upgrade required'}), 400
+    
+    ws = Server(request.environ)
+    interval = 1.0 / TELEMETRY_HZ
+    last_frame = None
+    
+    try:
+        while ws.connected:
+            frame = pack_telemetry()
+            if frame != last_frame:
+                ws.send(frame)
+                last_frame = frame
+            time.sleep(interval)
+    except ConnectionClosed:
+        pass
+    
+    return _WebSocketResponse(ws.mode)
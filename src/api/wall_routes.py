@@ -1,29 +1,53 @@
 """Wall calibration API routes"""
-from flask import Blueprint, request, jsonify
+import uuid
+from typing import Optional
 
+import numpy as np
+from flask import Blueprint, Response, jsonify, request
+
+from .decorators import with_json
+from .responses import install_json_error_handlers
 from ..services.wall_service import wall_service
 from ..services.robot_controller import robot_controller
 from ..models.robot_state import robot_state
 
 wall_bp = Blueprint('wall', __name__)
+install_json_error_handlers(wall_bp)
+
+# Distinguishes this process's calibration versions from a previous run's
+_ETAG_EPOCH = uuid.uuid4().hex[:8]
+
+def _calibrations_etag() -> str:
+    """ETag for the current calibration set"""
+    return f'{_ETAG_EPOCH}-{wall_service.version}'
+
+def _not_modified(etag: str) -> Optional[Response]:
+    """304 response if the client already has this version, else None"""
+    if etag in request.if_none_match:
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    return None
 
 @wall_bp.route('/api/wall/calibrations', methods=['GET'])
 def get_wall_calibrations():
     """Get all wall calibrations"""
-    try:
-        calibrations = wall_service.get_all_calibrations()
-        return jsonify({
-            'success': True,
-            'calibrations': calibrations
-        })
-    except Exception as e:
-        return jsonify({'success': False, 'message': str(e)})
+    etag = _calibrations_etag()
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    
+    calibrations = wall_service.get_all_calibrations()
+    response = jsonify({
+        'success': True,
+        'calibrations': calibrations
+    })
+    response.set_etag(etag)
+    return response
 
 @wall_bp.route('/api/wall/save-calibration', methods=['POST'])
-def save_wall_calibration():
+@with_json
+def save_wall_calibration(data):
     """Save a wall calibration"""
     try:
-        data = request.json or {}
         name = data.get('name', '').strip()
         points = data.get('points', [])
         plane = data.get('plane')
@@ -47,10 +71,10 @@ def save_wall_calibration():
         return jsonify({'success': False, 'message': f'Failed to save calibration: {str(e)}'})
 
 @wall_bp.route('/api/wall/delete-calibration', methods=['POST'])
-def delete_wall_calibration():
+@with_json
+def delete_wall_calibration(data):
     """Delete a wall calibration"""
     try:
-        data = request.json or {}
         name = data.get('name', '').strip()
         
         if not name:
@@ -66,88 +90,79 @@ def delete_wall_calibration():
         return jsonify({'success': False, 'message': f'Failed to delete calibration: {str(e)}'})
 
 @wall_bp.route('/api/wall/calculate-plane', methods=['POST'])
-def calculate_plane():
+@with_json
+def calculate_plane(data):
     """Calculate best-fit plane from calibration points using least squares"""
-    try:
-        data = request.json or {}
-        points = data.get('points', [])
-        
-        if len(points) < 3:
-            return jsonify({'success': False, 'message': 'At least 3 points required to calculate plane'})
-        
-        # Extract 3D positions from points
-        positions = []
-        for point in points:
-            position = point.get('position')
-            if position and len(position) == 3:
-                positions.append(position)
-        
-        if len(positions) < 3:
-            return jsonify({'success': False, 'message': 'At least 3 valid positions required'})
-        
-        plane, fit_error = wall_service.calculate_best_fit_plane(positions)
-        
-        return jsonify({
-            'success': True,
-            'plane': plane,
-            'fitError': fit_error,
-            'message': f'Plane calculated from {len(positions)} points'
-        })
-        
-    except Exception as e:
-        return jsonify({'success': False, 'message': str(e)})
+    points = data.get('points', [])
+    
+    if len(points) < 3:
+        return jsonify({'success': False, 'message': 'At least 3 points required to calculate plane'})
+    
+    # Extract 3D positions from points into one array for the fit
+    positions = np.array([point['position'] for point in points
+                          if point.get('position') and len(point['position']) == 3],
+                         dtype=float).reshape(-1, 3)
+    
+    if len(positions) < 3:
+        return jsonify({'success': False, 'message': 'At least 3 valid positions required'})
+    
+    plane, fit_error = wall_service.calculate_best_fit_plane(positions)
+    
+    return jsonify({
+        'success': True,
+        'plane': plane,
+        'fitError': fit_error,
+        'message': f'Plane calculated from {len(positions)} points'
+    })
 
 @wall_bp.route('/api/wall/map-point', methods=['POST'])
-def map_screen_to_world():
+@with_json
+def map_screen_to_world(data):
     """Map screen coordinates to world coordinates using calibrated plane"""
-    try:
-        data = request.json or {}
-        calibration_name = data.get('calibrationName', '').strip()
-        screen_coords = data.get('screenCoords')  # [x, y] in pixels
-        
-        if not calibration_name:
-            return jsonify({'success': False, 'message': 'Calibration name is required'})
-        
-        if not screen_coords or len(screen_coords) != 2:
-            return jsonify({'success': False, 'message': 'Valid screen coordinates [x, y] required'})
-        
-        world_position, robot_angles = wall_service.map_screen_to_world(
-            calibration_name, screen_coords
-        )
-        
-        return jsonify({
-            'success': True,
-            'worldPosition': world_position,
-            'robotAngles': robot_angles,
-            'message': f'Mapped screen coords {screen_coords} to world position'
-        })
-        
-    except ValueError as e:
-        return jsonify({'success': False, 'message': str(e)})
-    except Exception as e:
-        return jsonify({'success': False, 'message': str(e)})
+    calibration_name = data.get('calibrationName', '').strip()
+    screen_coords = data.get('screenCoords')  # [x, y] in pixels
+    
+    if not calibration_name:
+        return jsonify({'success': False, 'message': 'Calibration name is required'})
+    
+    if not screen_coords or len(screen_coords) != 2:
+        return jsonify({'success': False, 'message': 'Valid screen coordinates [x, y] required'})
+    
+    world_position, robot_angles = wall_service.map_screen_to_world(
+        calibration_name, screen_coords
+    )
+    
+    return jsonify({
+        'success': True,
+        'worldPosition': world_position,
+        'robotAngles': robot_angles,
+        'message': f'Mapped screen coords {screen_coords} to world position'
+    })
 
 @wall_bp.route('/api/wall/get-calibration/<calibration_name>', methods=['GET'])
 def get_wall_calibration(calibration_name):
     """Get a specific wall calibration"""
-    try:
-        calibration = wall_service.get_calibration(calibration_name)
-        if not calibration:
-            return jsonify({'success': False, 'message': f'Calibration "{calibration_name}" not found'})
-        
-        return jsonify({
-            'success': True,
-            'calibration': calibration
-        })
-        
-    except Exception as e:
-        return jsonify({'success': False, 'message': str(e)})
+    etag = _calibrations_etag()
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    
+    calibration = wall_service.get_calibration(calibration_name)
+    if not calibration:
+        return jsonify({'success': False, 'message': f'Calibration "{calibration_name}" not found'})
+    
+    response = jsonify({
+        'success': True,
+        'calibration': calibration
+    })
+    response.set_etag(etag)
+    return response
 
 @wall_bp.route('/api/wall/create-plane-calibration', methods=['POST'])
-def create_plane_calibration():
+@with_json
+def create_plane_calibration(data):
     """Create a plane calibration based on current end effector orientation"""
     try:
-        data = request.json or {}
         name = data.get('name', '').strip()
         
         if not name:
@@ -181,10 +196,10 @@ def create_plane_calibration():
         return jsonify({'success': False, 'message': f'Failed to create calibration: {str(e)}'})
 
 @wall_bp.route('/api/wall/move-in-plane', methods=['POST'])
-def move_in_plane():
+@with_json
+def move_in_plane(data):
     """Move in the calibrated plane using local coordinates"""
     try:
-        data = request.json or {}
         calibration_name = data.get('calibrationName', '').strip()
         dx_local = data.get('dxLocal', 0.0)  # Movement in local X (mm)
         dy_local = data.get('dyLocal', 0.0)  # Movement in local Y (mm)
@@ -219,32 +234,28 @@ def move_in_plane():
 @wall_bp.route('/api/wall/get-current-plane', methods=['GET'])
 def get_current_plane():
     """Get the current working plane based on end effector orientation"""
-    try:
-        if not robot_controller.is_connected():
-            return jsonify({'success': False, 'message': 'Robot not connected'})
-        
-        current_angles = robot_controller.get_angles()
-        if not current_angles:
-            return jsonify({'success': False, 'message': 'Could not get current robot angles'})
-        
-        # Disabled: Custom kinematics removed
-        coords = robot_controller._mc.get_coords()
-        if not coords or len(coords) != 6:
-            return jsonify({'success': False, 'message': 'Could not get current coordinates'})
-        
-        plane_info = {
-            'point': coords[:3],  # [x, y, z]
-            'normal': [0, 0, 1],  # Default to XY plane
-            'local_x_axis': [1, 0, 0],
-            'local_y_axis': [0, 1, 0], 
-            'orientation': coords[3:]  # [rx, ry, rz]
-        }
-        
-        return jsonify({
-            'success': True,
-            'plane': plane_info,
-            'currentAngles': current_angles
-        })
-        
-    except Exception as e:
-        return jsonify({'success': False, 'message': str(e)})
\ No newline at end of file
+    if not robot_controller.is_connected():
+        return jsonify({'success': False, 'message': 'Robot not connected'})
+    
+    current_angles = robot_controller.get_angles()
+    if not current_angles:
+        return jsonify({'success': False, 'message': 'Could not get current robot angles'})
+    
+    # Disabled: Custom kinematics removed
+    coords = robot_controller._mc.get_coords()
+    if not coords or len(coords) != 6:
+        return jsonify({'success': False, 'message': 'Could not get current coordinates'})
+    
+    plane_info = {
+        'point': coords[:3],  # [x, y, z]
+        'normal': [0, 0, 1],  # Default to XY plane
+        'local_x_axis': [1, 0, 0],
+        'local_y_axis': [0, 1, 0], 
+        'orientation': coords[3:]  # [rx, ry, rz]
+    }
+    
+    return jsonify({
+        'success': True,
+        'plane': plane_info,
+        'currentAngles': current_angles
+    })
\ No newline at end of file
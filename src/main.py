@@ -1,5 +1,5 @@
 """Main Flask application entry point"""
-from flask import Flask, render_template
+from flask import Flask, jsonify, render_template
 from flask_socketio import SocketIO, emit
 
 from .api.robot_routes import robot_bp
@@ -9,10 +9,13 @@ from .api.procedure_routes import procedure_bp
 from .api.react_routes import react_bp
 from .api.apriltag_routes import apriltag_bp
 from .api.wall_routes import wall_bp
+from .api.telemetry_routes import telemetry_bp
 from .services.robot_controller import robot_controller
 from .services.position_service import position_service
 from .services.procedure_service import procedure_service
-from .utils.config import SECRET_KEY, CORS_ALLOWED_ORIGINS, HOST, PORT, DEBUG
+from .models.robot_state import robot_state
+from .utils.json_provider import init_json_provider
+from .utils.config import SECRET_KEY, MAX_CONTENT_LENGTH, CORS_ALLOWED_ORIGINS, SOCKETIO_ASYNC_MODE, STATUS_PUSH_INTERVAL, HOST, PORT, DEBUG
 
 def create_app():
     """Create and configure Flask application"""
@@ -21,9 +24,14 @@ def create_app():
                 static_folder='../static')
     
     app.config['SECRET_KEY'] = SECRET_KEY
+    app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+    init_json_provider(app)
+    # Responses are read by our own frontend, so skip key sorting and indentation
+    app.json.sort_keys = False
+    app.json.compact = True
     
     # Initialize SocketIO
-    socketio = SocketIO(app, cors_allowed_origins=CORS_ALLOWED_ORIGINS)
+    socketio = SocketIO(app, async_mode=SOCKETIO_ASYNC_MODE, cors_allowed_origins=CORS_ALLOWED_ORIGINS)
     
     # Register blueprints
     app.register_blueprint(robot_bp)
@@ -33,6 +41,13 @@ def create_app():
     app.register_blueprint(react_bp)
     app.register_blueprint(apriltag_bp)
     app.register_blueprint(wall_bp)
+    app.register_blueprint(telemetry_bp)
+    
+    # Bodies over MAX_CONTENT_LENGTH are refused by werkzeug before they are read;
+    # answer in the API's usual shape rather than with an HTML error page
+    @app.errorhandler(413)
+    def payload_too_large(e):
+        return jsonify({'success': False, 'message': f'Request body exceeds {MAX_CONTENT_LENGTH} bytes'}), 413
     
     # Legacy template routes (keep for backwards compatibility)
     @app.route('/legacy')
@@ -56,6 +71,17 @@ def create_app():
     def handle_status_request():
         emit('status_update', robot_controller.get_current_status())
     
+    def push_status_updates():
+        """Broadcast status_update whenever robot state changes, instead of clients polling"""
+        version = robot_state.version
+        while True:
+            version = robot_state.wait_for_change(version)
+            socketio.emit('status_update', robot_controller.get_current_status())
+            # Coalesce bursts (e.g. slider drags) into one push per interval
+            socketio.sleep(STATUS_PUSH_INTERVAL)
+    
+    socketio.start_background_task(push_status_updates)
+    
     return app, socketio
 
 def main():
@@ -1,14 +1,17 @@
 """Robot state management"""
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from dataclasses import dataclass, field
 import threading
 import time
 
+from ..utils.config import ANGLE_LIMITS
+
 @dataclass
 class RobotState:
     """Manages the current state of the robot"""
-    # Joint angles (what we believe the robot should currently be at)
-    ideal_angles: List[float] = field(default_factory=lambda: [0.0, 0.0, 0.0, 0.0, 0.0, 0.0])
+    # Joint angles (what we believe the robot should currently be at).
+    # Stored as a tuple and replaced wholesale, so readers can share it without copying
+    ideal_angles: Tuple[float, ...] = (0.0,) * 6
     
     # Plane movement flag to know when to use ideal coordinates vs robot readings
     plane_mode_active: bool = False
@@ -22,26 +25,56 @@ class RobotState:
     is_recording: bool = False
     is_playing: bool = False
     is_jiggling: bool = False
-    recorded_moves: List[List[float]] = field(default_factory=list)
+    recorded_moves: List[Tuple[float, ...]] = field(default_factory=list)
     
     # Camera state
     camera_active: bool = False
     is_recording_video: bool = False
     video_filename: Optional[str] = None
     
+    # Set when playback/jiggling is told to stop, so worker threads can block
+    # on them instead of polling the flags between moves
+    play_stopped: threading.Event = field(default_factory=threading.Event)
+    jiggle_stopped: threading.Event = field(default_factory=threading.Event)
+    
     # Thread safety
     _lock: threading.Lock = field(default_factory=threading.Lock)
 
     def __post_init__(self):
         """Initialize state after creation"""
         self._lock = threading.Lock()
+        # Bumped on every mutation so status pushes only happen on real changes
+        self._version = 0
+        self._changed = threading.Condition(self._lock)
+        # Read-only view of recorded_moves, rebuilt lazily after the moves change
+        self._moves_snapshot: Optional[Tuple[Tuple[float, ...], ...]] = None
+        # When ideal_angles was last written, so readers can tell if it is fresh
+        self._ideal_updated_at = 0.0
+        self.play_stopped.set()
+        self.jiggle_stopped.set()
+    
+    def _mark_changed(self):
+        """Record a state change - caller must hold the lock"""
+        self._version += 1
+        self._changed.notify_all()
+    
+    @property
+    def version(self) -> int:
+        """Current state version"""
+        return self._version
+    
+    def wait_for_change(self, last_version: int, timeout: Optional[float] = None) -> int:
+        """Block until the state version moves past last_version, returns the new version"""
+        with self._lock:
+            self._changed.wait_for(lambda: self._version != last_version, timeout)
+            return self._version
 
     def get_status_dict(self, connected: bool, angles: Optional[List[float]] = None) -> dict:
         """Get current status as dictionary for API responses"""
         with self._lock:
             return {
                 'connected': connected,
-                'angles': angles or self.ideal_angles.copy(),
+                'angles': angles or self.ideal_angles,
                 'is_recording': self.is_recording,
                 'is_playing': self.is_playing,
                 'is_jiggling': self.is_jiggling,
@@ -52,26 +85,39 @@ class RobotState:
     
     def _get_joint_limits(self):
         """Get joint limits from config"""
-        from ..utils.config import ANGLE_LIMITS
         return ANGLE_LIMITS
     
     def update_ideal_angles(self, angles: List[float]):
         """Update ideal angles thread-safely"""
         with self._lock:
-            self.ideal_angles = angles.copy()
+            self._mark_changed()
+            self.ideal_angles = tuple(angles)
             self.state_initialized = True
+            self._ideal_updated_at = time.monotonic()
     
-    def update_joint_angle(self, joint_id: int, angle: float):
-        """Update a single joint angle"""
+    def update_joint_angle(self, joint_id: int, angle: float) -> Tuple[float, ...]:
+        """Update a single joint angle, returns the resulting ideal angles"""
         with self._lock:
-            if 0 <= joint_id < len(self.ideal_angles):
-                self.ideal_angles[joint_id] = angle
+            self._mark_changed()
+            angles = self.ideal_angles
+            if 0 <= joint_id < len(angles):
+                self.ideal_angles = angles[:joint_id] + (angle,) + angles[joint_id + 1:]
                 self.state_initialized = True
+                self._ideal_updated_at = time.monotonic()
+            return self.ideal_angles
+    
+    def get_ideal_angles(self) -> Tuple[float, ...]:
+        """Get current ideal angles - the tuple is immutable, so no copy is needed"""
+        return self.ideal_angles
     
-    def get_ideal_angles(self) -> List[float]:
-        """Get current ideal angles thread-safely"""
+    def get_fresh_ideal_angles(self, max_age: float) -> Optional[Tuple[float, ...]]:
+        """Get ideal angles if they were written within max_age seconds and nothing is playing back"""
         with self._lock:
-            return self.ideal_angles.copy()
+            if not self.state_initialized or self.is_playing or self.is_jiggling:
+                return None
+            if time.monotonic() - self._ideal_updated_at >= max_age:
+                return None
+            return self.ideal_angles
     
     def get_ideal_cartesian(self, robot_controller) -> Optional[List[float]]:
         """Get ideal Cartesian coordinates from ideal angles using forward kinematics"""
@@ -81,7 +127,7 @@ class RobotState:
             try:
                 # Use MyCobot's forward kinematics to calculate cartesian from ideal angles
                 # NEVER query the robot - only use the ideal state
-                coords = robot_controller._mc.angles_to_coords(self.ideal_angles)
+                coords = robot_controller._mc.angles_to_coords(list(self.ideal_angles))
                 if coords and len(coords) >= 6:
                     return coords
                 else:
@@ -94,69 +140,130 @@ class RobotState:
     def set_plane_mode(self, active: bool):
         """Set plane movement mode"""
         with self._lock:
+            self._mark_changed()
             self.plane_mode_active = active
     
     
     def set_power_state(self, powered: bool):
         """Set robot power state"""
         with self._lock:
+            self._mark_changed()
             self.robot_powered = powered
     
     def set_manual_control(self, active: bool):
         """Set manual control state"""
         with self._lock:
+            self._mark_changed()
             self.manual_control_active = active
     
     def is_busy(self) -> bool:
-        """Check if robot is currently busy with operations"""
-        with self._lock:
-            return self.is_recording or self.is_playing or self.is_jiggling
+        """Check if robot is currently busy with operations
+        
+        Lock-free: bool attribute reads are atomic, and callers that need to act on
+        the answer atomically use try_start_playing/try_start_jiggling instead.
+        """
+        return self.is_recording or self.is_playing or self.is_jiggling
     
     def set_recording_state(self, recording: bool):
         """Set recording state"""
         with self._lock:
+            self._mark_changed()
             self.is_recording = recording
             if recording:
                 self.recorded_moves.clear()
+                self._moves_snapshot = None
     
     def add_recorded_move(self, angles: List[float]):
         """Add a move to recorded choreography"""
         with self._lock:
-            self.recorded_moves.append(angles.copy())
+            self._mark_changed()
+            self.recorded_moves.append(tuple(angles))
+            self._moves_snapshot = None
+    
+    def get_recorded_moves(self) -> List[Tuple[float, ...]]:
+        """Get recorded moves safely - the moves themselves are immutable and shared"""
+        with self._lock:
+            return list(self.recorded_moves)
     
-    def get_recorded_moves(self) -> List[List[float]]:
-        """Get recorded moves safely"""
+    def snapshot_recorded_moves(self) -> Tuple[Tuple[float, ...], ...]:
+        """Get recorded moves without copying"""
         with self._lock:
-            return [move.copy() for move in self.recorded_moves]
+            if self._moves_snapshot is None:
+                self._moves_snapshot = tuple(self.recorded_moves)
+            return self._moves_snapshot
     
     def clear_recorded_moves(self):
         """Clear all recorded moves"""
         with self._lock:
+            self._mark_changed()
             self.recorded_moves.clear()
+            self._moves_snapshot = None
     
     def set_playing_state(self, playing: bool):
         """Set choreography playing state"""
         with self._lock:
+            self._mark_changed()
             self.is_playing = playing
+            if playing:
+                self.play_stopped.clear()
+            else:
+                self.play_stopped.set()
+    
+    def try_start_playing(self) -> bool:
+        """Atomically enter the playing state, returns False if the robot is already busy"""
+        with self._lock:
+            if self.is_recording or self.is_playing or self.is_jiggling:
+                return False
+            self._mark_changed()
+            self.is_playing = True
+            self.play_stopped.clear()
+            return True
+    
+    def request_stop_playing(self):
+        """Ask the running playback to stop - the job releases the playing claim itself once it has finished"""
+        self.play_stopped.set()
     
     def set_jiggling_state(self, jiggling: bool):
         """Set jiggling state"""
         with self._lock:
+            self._mark_changed()
             self.is_jiggling = jiggling
+            if jiggling:
+                self.jiggle_stopped.clear()
+            else:
+                self.jiggle_stopped.set()
+    
+    def try_start_jiggling(self) -> bool:
+        """Atomically enter the jiggling state, returns False if the robot is already busy"""
+        with self._lock:
+            if self.is_recording or self.is_playing or self.is_jiggling:
+                return False
+            self._mark_changed()
+            self.is_jiggling = True
+            self.jiggle_stopped.clear()
+            return True
+    
+    def request_stop_jiggling(self):
+        """Ask the running jiggle to stop - the job releases the jiggling claim itself once it has finished"""
+        self.jiggle_stopped.set()
     
     def set_video_recording_state(self, recording: bool, filename: Optional[str] = None):
         """Set video recording state"""
         with self._lock:
+            self._mark_changed()
             self.is_recording_video = recording
             self.video_filename = filename
     
     def reset_to_safe_state(self):
         """Reset to safe state (stop all operations)"""
         with self._lock:
+            self._mark_changed()
             self.is_recording = False
             self.is_playing = False
             self.is_jiggling = False
             self.manual_control_active = False
+            self.play_stopped.set()
+            self.jiggle_stopped.set()
 
 # Global state instance
 robot_state = RobotState()
\ No newline at end of file
@@ -2,13 +2,52 @@
 import cv2
 import numpy as np
 import math
+import threading
+import time
 import apriltag
 from typing import List, Dict, Optional, Tuple
 
+from .camera_service import camera_service, mjpeg_part, STREAM_JPEG_PARAMS
+from ..utils.kinematics import njit, NUMBA_AVAILABLE
+
+@njit(cache=True, fastmath=True)
+def _tag_distances_jit(corners: np.ndarray, focal_length: float, tag_size: float) -> np.ndarray:
+    """Distance to each tag in an (N, 4, 2) corner array from its mean edge length in pixels"""
+    out = np.empty(corners.shape[0], np.float64)
+    # distance = size * focal / ((width + height) / 2), with the constant folded once
+    twice_size_focal = 2.0 * tag_size * focal_length
+    for k in range(corners.shape[0]):
+        width = math.hypot(corners[k, 1, 0] - corners[k, 0, 0], corners[k, 1, 1] - corners[k, 0, 1])
+        height = math.hypot(corners[k, 2, 0] - corners[k, 1, 0], corners[k, 2, 1] - corners[k, 1, 1])
+        out[k] = twice_size_focal / (width + height)
+    return out
+
+def _tag_distances_numpy(corners: np.ndarray, focal_length: float, tag_size: float) -> np.ndarray:
+    """Vectorized NumPy equivalent of _tag_distances_jit"""
+    # hypot on the edge components skips np.linalg.norm's generic axis reduction
+    width_edges = corners[:, 1] - corners[:, 0]
+    height_edges = corners[:, 2] - corners[:, 1]
+    width = np.hypot(width_edges[:, 0], width_edges[:, 1])
+    height = np.hypot(height_edges[:, 0], height_edges[:, 1])
+    return (2.0 * tag_size * focal_length) / (width + height)
+
+tag_distances = _tag_distances_jit if NUMBA_AVAILABLE else _tag_distances_numpy
+
+def _reuse_buffer(buffer: Optional[np.ndarray], shape: Tuple[int, int]) -> np.ndarray:
+    """Return buffer if it is a uint8 image of this shape, otherwise allocate one"""
+    if buffer is None or buffer.shape != shape:
+        return np.empty(shape, dtype=np.uint8)
+    return buffer
+
 class AprilTagService:
     """Handles AprilTag detection and distance calculation"""
     
     def __init__(self):
+        # Guards the camera/tag parameters below; bumping params_version tells
+        # per-frame caches that results computed with the old values are stale
+        self._params_lock = threading.RLock()
+        self.params_version = 0
+        
         # ONN 1440p webcam estimated parameters
         # Based on 85-degree field of view and 1440p resolution
         self.image_width = 640  # Current streaming resolution from camera service
@@ -36,65 +75,148 @@ class AprilTagService:
         # Distortion coefficients (assuming minimal distortion for webcam)
         self.dist_coeffs = np.array([0.1, -0.2, 0, 0, 0], dtype=np.float64)
         
-        # AprilTag detector - Use all standard families and optimize for detection
-        self.detector = apriltag.Detector(apriltag.DetectorOptions(
-            families='tag36h11 tag25h9 tag16h5',  # Standard families that work
-            border=1,
-            nthreads=4,
-            quad_decimate=0.8,  # Lower decimation for better small tag detection
-            quad_blur=0.0,
-            refine_edges=True,
-            refine_decode=True,  # Enable decode refinement for better accuracy
-            refine_pose=True
-        ))
+        # Two alternative ways to cut detection cost; only one applies at a time.
+        # With detect_scale < 1 the frame is shrunk before detection and the
+        # detector runs with quad_decimate 1, so quads are found and corners refined
+        # on the same downscaled image (320x240 for a 640x480 frame at 0.5).
+        # With detect_scale == 1, quad_decimate shrinks only the image used for
+        # quad detection and refine_edges snaps corners against the full frame.
+        # Either way detection runs on a half-resolution image by default; the
+        # downscale is cheaper but its corners (and so distances and poses) are
+        # about twice as coarse in camera pixels.
+        self.quad_decimate = 2.0
+        # Frames are downscaled by this factor before detection; corners are
+        # mapped back so distances and poses are reported in the original image frame
+        self.detect_scale = 0.5
+        self.detector = self._build_detector()
+        
+        # Scratch images for detect_tags, reused across frames instead of
+        # allocated per call; the lock also keeps detector.detect single-threaded
+        self._detect_lock = threading.Lock()
+        self._gray_buffer: Optional[np.ndarray] = None
+        self._small_buffer: Optional[np.ndarray] = None
         
         # Standard AprilTag size (you can adjust this)
         self.tag_size_meters = 0.05  # 5cm tags (common size)
+        self._object_points = self._build_object_points()
+        self._axis_points = self._build_axis_points()
         
         print(f"AprilTag service initialized:")
         print(f"  Camera resolution: {self.image_width}x{self.image_height}")
         print(f"  Estimated focal length: {self.focal_length:.1f} pixels")
         print(f"  Tag size: {self.tag_size_meters*1000:.0f}mm")
+        print(f"  Quad decimate: {self.quad_decimate} (effective {self._effective_quad_decimate()})")
+        print(f"  Detect scale: {self.detect_scale}")
+    
+    def _effective_quad_decimate(self) -> float:
+        """Decimation the detector actually uses - downscaling replaces it rather than stacking on it"""
+        return 1.0 if self.detect_scale < 1.0 else self.quad_decimate
+    
+    def _build_detector(self) -> apriltag.Detector:
+        """Create the AprilTag detector - Use all standard families and optimize for detection"""
+        return apriltag.Detector(apriltag.DetectorOptions(
+            families='tag36h11 tag25h9 tag16h5',  # Standard families that work
+            border=1,
+            nthreads=4,
+            quad_decimate=self._effective_quad_decimate(),
+            quad_blur=0.0,  # No Gaussian blur before thresholding
+            refine_edges=True,
+            refine_decode=True,  # Enable decode refinement for better accuracy
+            refine_pose=True
+        ))
+    
+    def update_quad_decimate(self, quad_decimate: float):
+        """Update quad decimation and rebuild the detector"""
+        if quad_decimate < 1.0:
+            raise ValueError('quad_decimate must be >= 1.0')
+        with self._params_lock:
+            if quad_decimate != self.quad_decimate:
+                self.quad_decimate = quad_decimate
+                self.detector = self._build_detector()
+                self.params_version += 1
+        print(f"Updated quad decimate to {quad_decimate}")
+    
+    def update_detect_scale(self, scale: float):
+        """Update the downscale factor applied to frames before detection"""
+        if not 0.0 < scale <= 1.0:
+            raise ValueError('detect_scale must be in (0, 1]')
+        with self._params_lock:
+            old_decimate = self._effective_quad_decimate()
+            self.detect_scale = scale
+            if self._effective_quad_decimate() != old_decimate:
+                self.detector = self._build_detector()
+            self.params_version += 1
+        print(f"Updated detect scale to {scale}")
     
     def detect_tags(self, image: np.ndarray) -> List[Dict]:
         """
         Detect AprilTags in image and calculate distances
         
         Args:
-            image: Input image as numpy array (BGR format)
+            image: Input image as numpy array (grayscale, or BGR which is converted)
             
         Returns:
             List of detected tags with position and distance info
         """
-        # Convert to grayscale for AprilTag detection
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
+        # One consistent snapshot of the parameters for this whole detection
+        with self._params_lock:
+            scale = self.detect_scale
+            focal_length = self.focal_length
+            tag_size = self.tag_size_meters
+            camera_matrix = self.camera_matrix
+            object_points = self._object_points
+        
+        with self._detect_lock:
+            # Convert to grayscale for AprilTag detection
+            if len(image.shape) == 3:
+                self._gray_buffer = _reuse_buffer(self._gray_buffer, image.shape[:2])
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self._gray_buffer)
+            else:
+                gray = image
+            
+            # Thresholding and clustering scale with pixel count, so shrink first
+            if scale != 1.0:
+                height, width = gray.shape[:2]
+                small_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+                self._small_buffer = _reuse_buffer(self._small_buffer, (small_size[1], small_size[0]))
+                gray = cv2.resize(gray, small_size, dst=self._small_buffer, interpolation=cv2.INTER_AREA)
             
-        # Detect AprilTags
-        detections = self.detector.detect(gray)
+            # Detect AprilTags - results own their arrays, so the buffers are free after this
+            detections = self.detector.detect(gray)
         
         results = []
+        if not detections:
+            return results
         
-        for detection in detections:
+        # Map back into original image coordinates, all tags in one array
+        all_corners = np.array([d.corners for d in detections], dtype=np.float64) / scale
+        
+        # Distance formula: distance = (real_size * focal_length) / pixel_size,
+        # where pixel_size is the mean of the tag's width and height
+        with np.errstate(divide='ignore'):
+            distances = tag_distances(all_corners, focal_length, tag_size)
+        
+        for detection, corners, distance in zip(detections, all_corners, distances):
+            center = detection.center / scale
+            
             tag_info = {
                 'tag_id': detection.tag_id,
-                'center': detection.center.tolist(),
-                'corners': detection.corners.tolist(),
+                # Arrays stay arrays until the JSON provider serializes them
+                'center': center,
+                'corners': corners,
                 'hamming': detection.hamming,
                 'decision_margin': detection.decision_margin
             }
             
-            # Calculate distance using tag size and camera parameters
-            distance = self._calculate_distance(detection)
-            if distance is not None:
+            # Degenerate (zero-size) quads have no meaningful distance
+            if math.isfinite(distance):
+                distance = float(distance)
                 tag_info['distance_meters'] = distance
                 tag_info['distance_cm'] = distance * 100
                 tag_info['distance_inches'] = distance * 39.3701
             
             # Calculate pose (rotation and translation)
-            pose = self._calculate_pose(detection)
+            pose = self._calculate_pose(corners, camera_matrix, object_points)
             if pose is not None:
                 tag_info['pose'] = pose
                 
@@ -102,64 +224,54 @@ class AprilTagService:
         
         return results
     
-    def _calculate_distance(self, detection) -> Optional[float]:
-        """Calculate distance to AprilTag using perspective geometry"""
-        try:
-            # Get the four corners of the detected tag
-            corners = detection.corners
-            
-            # Calculate the pixel width and height of the tag
-            # Use opposite corners for more accurate measurement
-            corner1, corner2, corner3, corner4 = corners
-            
-            # Calculate distances between opposite corners
-            pixel_width = np.linalg.norm(corner2 - corner1)
-            pixel_height = np.linalg.norm(corner3 - corner2) 
-            
-            # Use the average of width and height for distance calculation
-            pixel_size = (pixel_width + pixel_height) / 2
-            
-            # Distance formula: distance = (real_size * focal_length) / pixel_size
-            distance = (self.tag_size_meters * self.focal_length) / pixel_size
-            
-            return distance
-            
-        except Exception as e:
-            print(f"Error calculating distance: {e}")
-            return None
+    def _build_object_points(self) -> np.ndarray:
+        """3D tag corners in the tag frame, in the order SOLVEPNP_IPPE_SQUARE requires"""
+        # Tag is assumed to be on XY plane with Z=0
+        half_size = self.tag_size_meters / 2
+        return np.array([
+            [-half_size,  half_size, 0],  # Top left
+            [ half_size,  half_size, 0],  # Top right
+            [ half_size, -half_size, 0],  # Bottom right
+            [-half_size, -half_size, 0]   # Bottom left
+        ], dtype=np.float64)
     
-    def _calculate_pose(self, detection) -> Optional[Dict]:
-        """Calculate 3D pose of AprilTag"""
+    def _build_axis_points(self) -> np.ndarray:
+        """Origin and X/Y/Z axis tips in the tag frame, one tag size long, for _draw_axes"""
+        axis_length = self.tag_size_meters
+        return np.array([
+            [0, 0, 0],  # Origin
+            [axis_length, 0, 0],  # X axis (red)
+            [0, axis_length, 0],  # Y axis (green) 
+            [0, 0, -axis_length]  # Z axis (blue)
+        ], dtype=np.float64)
+    
+    def _calculate_pose(self, corners: np.ndarray, camera_matrix: np.ndarray,
+                        object_points: np.ndarray) -> Optional[Dict]:
+        """Calculate 3D pose of AprilTag from its corners"""
         try:
-            # Define 3D points of the tag in tag coordinate system
-            # Tag is assumed to be on XY plane with Z=0
-            half_size = self.tag_size_meters / 2
-            object_points = np.array([
-                [-half_size, -half_size, 0],  # Bottom left
-                [ half_size, -half_size, 0],  # Bottom right
-                [ half_size,  half_size, 0],  # Top right
-                [-half_size,  half_size, 0]   # Top left
-            ], dtype=np.float64)
-            
-            # 2D image points (corners of detected tag)
-            image_points = detection.corners.astype(np.float64)
-            
-            # Solve PnP to get rotation and translation vectors
+            # 2D image points (corners of detected tag). The detector lists them
+            # bottom-left first, so reverse them to line up with _object_points
+            image_points = np.ascontiguousarray(corners[::-1], dtype=np.float64)
+            
+            # IPPE_SQUARE is the closed-form solver for planar square markers -
+            # much cheaper than the default iterative Levenberg-Marquardt solve
             success, rvec, tvec = cv2.solvePnP(
                 object_points,
                 image_points,
-                self.camera_matrix,
-                self.dist_coeffs
+                camera_matrix,
+                self.dist_coeffs,
+                flags=cv2.SOLVEPNP_IPPE_SQUARE
             )
             
             if success:
                 # Convert rotation vector to rotation matrix
                 rmat, _ = cv2.Rodrigues(rvec)
                 
+                # Kept as arrays for draw_detections; the JSON provider converts them
                 return {
-                    'translation': tvec.flatten().tolist(),
-                    'rotation_vector': rvec.flatten().tolist(),
-                    'rotation_matrix': rmat.tolist(),
+                    'translation': tvec.ravel(),
+                    'rotation_vector': rvec.ravel(),
+                    'rotation_matrix': rmat,
                     'distance_from_pose': float(np.linalg.norm(tvec))
                 }
                 
@@ -171,10 +283,11 @@ class AprilTagService:
     def draw_detections(self, image: np.ndarray, detections: List[Dict]) -> np.ndarray:
         """Draw AprilTag detections on image with distance information"""
         result_image = image.copy()
+        poses = []
         
         for detection in detections:
             # Draw tag outline
-            corners = np.array(detection['corners'], dtype=int)
+            corners = np.asarray(detection['corners']).astype(np.int32, copy=False)
             cv2.polylines(result_image, [corners], True, (0, 255, 0), 2)
             
             # Draw center point
@@ -195,49 +308,99 @@ class AprilTagService:
                            (center[0] - 30, center[1] + 20),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
             
-            # Draw coordinate axes if pose is available
+            # Collect poses so all coordinate axes are projected together
             if 'pose' in detection:
-                self._draw_axes(result_image, detection['pose'])
+                poses.append(detection['pose'])
+        
+        if poses:
+            self._draw_axes(result_image, poses)
         
         return result_image
     
-    def _draw_axes(self, image: np.ndarray, pose: Dict):
-        """Draw 3D coordinate axes on the tag"""
+    def _draw_axes(self, image: np.ndarray, poses: List[Dict]):
+        """Draw 3D coordinate axes on each posed tag"""
         try:
-            # Define axis points in tag coordinate system
-            axis_length = self.tag_size_meters
-            axis_points = np.array([
-                [0, 0, 0],  # Origin
-                [axis_length, 0, 0],  # X axis (red)
-                [0, axis_length, 0],  # Y axis (green) 
-                [0, 0, -axis_length]  # Z axis (blue)
-            ], dtype=np.float64)
-            
-            # Project 3D points to 2D
-            rvec = np.array(pose['rotation_vector'])
-            tvec = np.array(pose['translation'])
+            with self._params_lock:
+                axis_points = self._axis_points
+                camera_matrix = self.camera_matrix
+            
+            # projectPoints takes one pose per call, so move every tag's axis points
+            # into the camera frame here and project them all in a single call
+            rotations = np.array([pose['rotation_matrix'] for pose in poses], dtype=np.float64)
+            translations = np.array([pose['translation'] for pose in poses], dtype=np.float64)
+            camera_points = axis_points @ rotations.transpose(0, 2, 1) + translations[:, None, :]
             
             projected_points, _ = cv2.projectPoints(
-                axis_points, rvec, tvec, self.camera_matrix, self.dist_coeffs
+                camera_points.reshape(-1, 3), np.zeros(3), np.zeros(3), camera_matrix, self.dist_coeffs
             )
             
-            # Convert to integer coordinates
-            projected_points = projected_points.reshape(-1, 2).astype(int)
-            origin = tuple(projected_points[0])
+            # Convert to integer coordinates, one row of 4 points per tag
+            projected_points = projected_points.reshape(-1, 4, 2).astype(int)
             
-            # Draw axes
-            cv2.arrowedLine(image, origin, tuple(projected_points[1]), (0, 0, 255), 3)  # X - Red
-            cv2.arrowedLine(image, origin, tuple(projected_points[2]), (0, 255, 0), 3)  # Y - Green
-            cv2.arrowedLine(image, origin, tuple(projected_points[3]), (255, 0, 0), 3)  # Z - Blue
+            for origin, x_tip, y_tip, z_tip in projected_points:
+                origin = tuple(origin)
+                cv2.arrowedLine(image, origin, tuple(x_tip), (0, 0, 255), 3)  # X - Red
+                cv2.arrowedLine(image, origin, tuple(y_tip), (0, 255, 0), 3)  # Y - Green
+                cv2.arrowedLine(image, origin, tuple(z_tip), (255, 0, 0), 3)  # Z - Blue
             
         except Exception as e:
             print(f"Error drawing axes: {e}")
     
     def update_tag_size(self, size_meters: float):
         """Update the expected tag size for distance calculations"""
-        self.tag_size_meters = size_meters
+        with self._params_lock:
+            self.tag_size_meters = size_meters
+            self._object_points = self._build_object_points()
+            self._axis_points = self._build_axis_points()
+            self.params_version += 1
         print(f"Updated tag size to {size_meters*1000:.0f}mm")
     
+    def scale_focal_length(self, correction_factor: float) -> Tuple[float, float]:
+        """Scale the focal length by a distance correction factor, returns (old, new)"""
+        with self._params_lock:
+            old_focal_length = self.focal_length
+            self.focal_length = old_focal_length * correction_factor
+            self.fx = self.focal_length
+            self.fy = self.focal_length
+            
+            # Swap in a new matrix instead of editing in place, so a detection
+            # holding the old one never sees it half-updated
+            camera_matrix = self.camera_matrix.copy()
+            camera_matrix[0, 0] = self.fx
+            camera_matrix[1, 1] = self.fy
+            self.camera_matrix = camera_matrix
+            self.params_version += 1
+            
+            return old_focal_length, self.focal_length
+    
+    def get_config(self) -> Dict:
+        """Current detection configuration as a JSON-ready dict"""
+        with self._params_lock:
+            return {
+                'tag_size_meters': self.tag_size_meters,
+                'tag_size_mm': self.tag_size_meters * 1000,
+                'camera_resolution': {
+                    'width': self.image_width,
+                    'height': self.image_height
+                },
+                'focal_length': self.focal_length,
+                'camera_matrix': self.camera_matrix.tolist(),
+                'quad_decimate': self.quad_decimate,
+                'detect_scale': self.detect_scale,
+                # What detection really runs at, given that a downscale disables quad_decimate
+                'effective_quad_decimate': self._effective_quad_decimate(),
+                'quad_detection_resolution': self._stage_resolution(
+                    self.detect_scale / self._effective_quad_decimate()),
+                'corner_refine_resolution': self._stage_resolution(self.detect_scale)
+            }
+    
+    def _stage_resolution(self, scale: float) -> Dict:
+        """Camera resolution scaled by a detection stage's factor - caller holds _params_lock"""
+        return {
+            'width': round(self.image_width * scale),
+            'height': round(self.image_height * scale)
+        }
+    
     def calibrate_camera(self, calibration_images: List[np.ndarray]) -> bool:
         """
         Calibrate camera using checkerboard images (optional improvement)
@@ -247,5 +410,163 @@ class AprilTagService:
         # For now, we use estimated parameters
         pass
 
-# Global service instance
-apriltag_service = AprilTagService()
\ No newline at end of file
+class AprilTagBroadcaster:
+    """Detects tags once per camera frame and shares the annotated JPEG with every stream client"""
+    
+    # Unchanged scenes still get a fresh frame this often so MJPEG clients stay alive
+    KEYFRAME_INTERVAL = 2.0
+    
+    def __init__(self, service: AprilTagService):
+        self._service = service
+        self._cond = threading.Condition()
+        self._subscribers = 0
+        self._thread: Optional[threading.Thread] = None
+        self.frame_id = 0
+        self.latest_jpeg_bytes: Optional[bytes] = None
+        # latest_jpeg_bytes framed as a multipart part for the stream generators
+        self.latest_part: Optional[bytes] = None
+        self.latest_detections: List[Dict] = []
+        # Camera frame and parameter version the latest JPEG was computed from,
+        # and the detections drawn on it
+        self.camera_seq = 0
+        self._jpeg_params = -1
+        self._jpeg_detections: List[Dict] = []
+        # Detections may also be computed on demand (no stream running), so they
+        # carry their own frame seq separate from the annotated JPEG's
+        self._detections_seq = -1
+        self._detections_params = -1
+    
+    def subscribe(self):
+        """Register a stream client, starting the detection worker if needed"""
+        with self._cond:
+            self._subscribers += 1
+            # _worker clears _thread under this lock when it decides to exit
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, daemon=True)
+                self._thread.start()
+    
+    def unsubscribe(self):
+        """Drop a stream client; the worker exits once none are left"""
+        with self._cond:
+            self._subscribers -= 1
+    
+    def wait_for_frame(self, last_id: int, timeout: float = 1.0) -> Tuple[int, Optional[bytes]]:
+        """Block until a result newer than last_id exists, returns (frame_id, mjpeg part) or (last_id, None) on timeout"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.frame_id != last_id, timeout):
+                return last_id, None
+            return self.frame_id, self.latest_part
+    
+    def latest_for(self, camera_seq: int) -> Optional[Tuple[bytes, List[Dict]]]:
+        """Get (jpeg, detections) if the latest result was computed from camera frame camera_seq"""
+        params = self._service.params_version
+        with self._cond:
+            if (self.latest_jpeg_bytes is None or self.camera_seq != camera_seq
+                    or self._jpeg_params != params):
+                return None
+            return self.latest_jpeg_bytes, self._jpeg_detections
+    
+    def current_detections(self) -> Tuple[Optional[List[Dict]], int]:
+        """Detections for the current camera frame and its seq - cached per frame, computed on a miss"""
+        seq = camera_service.frame_seq
+        params = self._service.params_version
+        with self._cond:
+            if self._detections_seq == seq and self._detections_params == params:
+                return self.latest_detections, seq
+        
+        gray = camera_service.read_latest_gray()
+        if gray is None:
+            return None, seq
+        
+        detections = self._service.detect_tags(gray)
+        with self._cond:
+            if seq >= self._detections_seq:
+                self.latest_detections = detections
+                self._detections_seq = seq
+                self._detections_params = params
+        return detections, seq
+    
+    @staticmethod
+    def _scene_signature(gray: np.ndarray) -> int:
+        """Cheap fingerprint of a frame - a coarse, quantized thumbnail so sensor noise doesn't count as change"""
+        return hash((gray[::16, ::16] >> 3).tobytes())
+    
+    def _worker(self):
+        """Detection thread body - runs detection exactly once per new camera frame"""
+        camera_seq = 0
+        last_signature = None
+        last_publish_time = 0.0
+        print("AprilTag broadcaster started")
+        
+        try:
+            while True:
+                with self._cond:
+                    if self._subscribers <= 0:
+                        # Decided under the lock, so a subscribe() racing with this exit
+                        # sees no worker and starts a new one instead of waiting on us
+                        self._thread = None
+                        break
+                
+                seq = camera_service.wait_for_frame(camera_seq)
+                if seq == camera_seq:
+                    # Camera stopped or stalled - back off instead of re-detecting the same image
+                    time.sleep(0.1)
+                    continue
+                camera_seq = seq
+                
+                # Published frames are never written to, so no copy is needed
+                frame, gray = camera_service.read_latest_pair()
+                if frame is None:
+                    continue
+                
+                # A static scene gives the same detections and overlay, so skip the
+                # detect/draw/encode work and don't push a duplicate frame
+                # Parameter changes (tag size, calibration) alter the overlay too
+                params = self._service.params_version
+                signature = (self._scene_signature(gray), params)
+                now = time.monotonic()
+                if signature == last_signature and now - last_publish_time < self.KEYFRAME_INTERVAL:
+                    with self._cond:
+                        self.camera_seq = seq
+                        self.latest_detections = self._jpeg_detections
+                        self._detections_seq = seq
+                        self._detections_params = params
+                    continue
+                
+                try:
+                    detections = self._service.detect_tags(gray)
+                    annotated_image = self._service.draw_detections(frame, detections)
+                    ret, buffer = cv2.imencode('.jpg', annotated_image, STREAM_JPEG_PARAMS)
+                except Exception as e:
+                    print(f"AprilTag broadcaster error: {e}")
+                    continue
+                
+                if not ret:
+                    continue
+                
+                jpeg_bytes = buffer.tobytes()
+                part = mjpeg_part(jpeg_bytes)
+                with self._cond:
+                    self.latest_jpeg_bytes = jpeg_bytes
+                    self.latest_part = part
+                    self.latest_detections = detections
+                    self.camera_seq = seq
+                    self._jpeg_params = params
+                    self._jpeg_detections = detections
+                    self._detections_seq = seq
+                    self._detections_params = params
+                    self.frame_id += 1
+                    self._cond.notify_all()
+                last_signature = signature
+                last_publish_time = now
+        finally:
+            with self._cond:
+                # An unexpected exit must not leave subscribers waiting on a dead worker
+                if self._thread is threading.current_thread():
+                    self._thread = None
+        
+        print("AprilTag broadcaster stopped")
+
+# Global service instances
+apriltag_service = AprilTagService()
+apriltag_broadcaster = AprilTagBroadcaster(apriltag_service)
\ No newline at end of file
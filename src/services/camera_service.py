@@ -1,14 +1,32 @@
 """Camera and video recording service"""
 import cv2
+import numpy as np
 import os
 import base64
 import datetime
 import threading
 import time
-from typing import Optional, Generator
+from typing import Optional, Generator, Tuple
 
 from ..models.robot_state import robot_state
-from ..utils.config import CAMERA_DEVICE, CAMERA_WIDTH, CAMERA_HEIGHT, CAMERA_FPS, VIDEOS_DIR, VIDEO_CODEC, VIDEO_FPS
+from ..utils.config import CAMERA_DEVICE, CAMERA_WIDTH, CAMERA_HEIGHT, CAMERA_FPS, CAMERA_NATIVE_MJPEG, STREAM_FPS, CAMERA_IDLE_TIMEOUT, STREAM_JPEG_QUALITY, SCREENSHOT_JPEG_QUALITY, VIDEOS_DIR, VIDEO_CODEC, VIDEO_FPS
+
+def jpeg_params(quality: int) -> list:
+    """Build an imencode parameter list - baseline, non-optimized JPEG at the given quality"""
+    return [cv2.IMWRITE_JPEG_QUALITY, quality,
+            cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+            cv2.IMWRITE_JPEG_PROGRESSIVE, 0]
+
+# Encode parameters shared by every imencode call site
+STREAM_JPEG_PARAMS = jpeg_params(STREAM_JPEG_QUALITY)
+SCREENSHOT_JPEG_PARAMS = jpeg_params(SCREENSHOT_JPEG_QUALITY)
+
+# Multipart part header for the MJPEG stream, completed with the JPEG length
+MJPEG_PART_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: '
+
+def mjpeg_part(jpeg: bytes) -> bytes:
+    """Frame a JPEG as one multipart part - a single join, so one allocation and one socket write"""
+    return b''.join((MJPEG_PART_HEADER, str(len(jpeg)).encode(), b'\r\n\r\n', jpeg, b'\r\n'))
 
 class CameraService:
     """Handles camera operations and video recording"""
@@ -16,8 +34,28 @@ class CameraService:
     def __init__(self):
         self._camera: Optional[cv2.VideoCapture] = None
         self._video_writer: Optional[cv2.VideoWriter] = None
+        self._writer_lock = threading.Lock()
+        # _camera_lock guards opening/releasing the device; _capture_lock serializes
+        # starting/stopping the capture thread and the stream client count
+        self._camera_lock = threading.RLock()
+        self._capture_lock = threading.Lock()
+        # Published frames are immutable: the capture thread hands over a freshly
+        # retrieved array each time and never writes to it again, so readers can
+        # use them without copying
         self._last_frame = None
+        self._last_jpeg: Optional[np.ndarray] = None
+        # Grayscale view of the latest frame, built at most once per frame for detection
+        self._last_gray: Optional[np.ndarray] = None
+        # Framed multipart part for the stream, built once per frame and shared by all clients
+        self._last_part: Optional[bytes] = None
+        self._part_seq = -1
         self._stream_active = False
+        
+        # Capture thread publishes the newest decoded frame into a single slot
+        self._frame_ready = threading.Condition()
+        self._frame_seq = 0
+        self._capture_thread: Optional[threading.Thread] = None
+        self._stream_clients = 0
         self._ensure_videos_dir()
     
     def _ensure_videos_dir(self):
@@ -26,17 +64,40 @@ class CameraService:
     
     def init_camera(self) -> Optional[cv2.VideoCapture]:
         """Initialize camera if not already initialized"""
-        if self._camera is None:
-            try:
-                self._camera = cv2.VideoCapture(CAMERA_DEVICE)
-                self._camera.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_WIDTH)
-                self._camera.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_HEIGHT)
-                self._camera.set(cv2.CAP_PROP_FPS, CAMERA_FPS)
-                print(f"Camera initialized: {CAMERA_DEVICE}")
-            except Exception as e:
-                print(f"Failed to initialize camera: {e}")
+        with self._camera_lock:
+            if self._camera is None:
+                try:
+                    self._camera = cv2.VideoCapture(CAMERA_DEVICE)
+                    if CAMERA_NATIVE_MJPEG:
+                        # Ask the UVC device for MJPEG (must precede the size settings) and
+                        # hand back the compressed buffer untouched so it needs no re-encode
+                        self._camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+                        self._camera.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+                    self._camera.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_WIDTH)
+                    self._camera.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_HEIGHT)
+                    self._camera.set(cv2.CAP_PROP_FPS, CAMERA_FPS)
+                    # Keep the driver queue shallow so grab() always returns a fresh frame
+                    self._camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                    print(f"Camera initialized: {CAMERA_DEVICE}")
+                except Exception as e:
+                    print(f"Failed to initialize camera: {e}")
+                    self._camera = None
+            return self._camera
+    
+    def _release_camera(self):
+        """Release the camera device and drop the frames it produced"""
+        with self._camera_lock:
+            if self._camera is not None:
+                self._camera.release()
                 self._camera = None
-        return self._camera
+                print("Camera released")
+        
+        with self._frame_ready:
+            self._last_frame = None
+            self._last_jpeg = None
+            self._last_gray = None
+            self._last_part = None
+            self._part_seq = -1
     
     def is_camera_available(self) -> bool:
         """Check if camera is available"""
@@ -45,11 +106,8 @@ class CameraService:
     
     def start_camera(self) -> bool:
         """Start camera streaming"""
-        if not self.is_camera_available():
-            return False
-        
-        robot_state.camera_active = True
-        return True
+        with self._capture_lock:
+            return self._start_capture()
     
     def stop_camera(self) -> bool:
         """Stop camera and release resources"""
@@ -59,51 +117,89 @@ class CameraService:
         if robot_state.is_recording_video:
             self.stop_video_recording()
         
-        if self._camera is not None:
-            self._camera.release()
-            self._camera = None
+        with self._capture_lock:
+            self._stop_capture()
+        self._release_camera()
         
         return True
     
-    def generate_frames(self) -> Generator[bytes, None, None]:
-        """Generate camera frames for streaming"""            
+    def _start_capture(self) -> bool:
+        """Start the capture thread if it is not already running - caller holds _capture_lock"""
+        thread = self._capture_thread
+        if thread is not None and thread.is_alive():
+            if robot_state.camera_active:
+                return True
+            # The previous thread is winding down; let it release the device
+            # before we reopen it so there is never a second reader
+            thread.join(timeout=2.0)
+        
+        if not self.is_camera_available():
+            return False
+        
+        robot_state.camera_active = True
+        self._capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._capture_thread.start()
+        return True
+    
+    def _stop_capture(self):
+        """Signal the capture thread to exit and wait for it - caller holds _capture_lock"""
+        robot_state.camera_active = False
+        thread = self._capture_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+        self._capture_thread = None
+    
+    def _capture_loop(self):
+        """Capture thread body - owns the camera and publishes the latest frame"""
+        camera = self._camera
+        frame_interval = 1.0 / STREAM_FPS
+        write_interval = 1.0 / VIDEO_FPS
+        last_retrieve_time = 0
+        next_write_time = 0.0
+        frame_count = 0
+        # When capture last had a viewer or a recording to feed
+        last_needed_time = time.monotonic()
+        print("Camera capture started")
+        
         try:
-            camera = self.init_camera()
-            if not camera:
-                print("Camera not available for streaming")
-                return
-            
-            robot_state.camera_active = True
-            print("Camera streaming started")
-            
-            # Limit streaming to 15 FPS for better performance
-            target_fps = 15
-            frame_interval = 1.0 / target_fps
-            last_frame_time = 0
-            frame_count = 0
-            
             while robot_state.camera_active:
-                current_time = time.time()
-                
-                if not camera.isOpened():
-                    print("Camera closed, stopping stream")
+                if camera is None or not camera.isOpened():
+                    print("Camera closed, stopping capture")
                     break
                 
-                success, frame = camera.read()
-                if not success:
-                    print(f"Failed to read frame {frame_count}")
+                # Capture started with no viewer (POST /api/camera/start) or left running
+                # after the last viewer and the recording ended would hold the device
+                # forever, so give up after CAMERA_IDLE_TIMEOUT
+                if self._stream_clients > 0 or robot_state.is_recording_video:
+                    last_needed_time = time.monotonic()
+                elif time.monotonic() - last_needed_time > CAMERA_IDLE_TIMEOUT:
+                    # Decide under _capture_lock so a viewer can't attach in between;
+                    # don't block on it, stop_camera may hold it while joining us
+                    if self._capture_lock.acquire(blocking=False):
+                        try:
+                            if self._stream_clients == 0 and not robot_state.is_recording_video:
+                                print("Camera idle with no viewers, stopping capture")
+                                robot_state.camera_active = False
+                                break
+                        finally:
+                            self._capture_lock.release()
+                
+                # grab() only pulls the frame off the device; the costly decode
+                # in retrieve() is deferred until a consumer actually needs it
+                if not camera.grab():
+                    print(f"Failed to grab frame {frame_count}")
                     print(f"Camera isOpened: {camera.isOpened()}")
                     print(f"Camera backend: {camera.getBackendName()}")
                     
                     # Try to reinitialize camera once
                     print("Attempting to reinitialize camera...")
-                    camera.release()
-                    self._camera = None
-                    camera = self.init_camera()
+                    with self._camera_lock:
+                        camera.release()
+                        self._camera = None
+                        camera = self.init_camera()
                     if camera and camera.isOpened():
                         print("Camera reinitialized successfully")
-                        success, frame = camera.read()
-                        if not success:
+                        if not camera.grab():
                             print("Camera reinit failed - still can't read frames")
                             break
                     else:
@@ -111,81 +207,241 @@ class CameraService:
                         break
                 
                 frame_count += 1
+                current_time = time.monotonic()
+                # The recorder is paced at VIDEO_FPS on the wall clock, independent of
+                # how fast stream clients consume frames
+                write_due = (robot_state.is_recording_video and self._video_writer is not None
+                             and current_time >= next_write_time)
+                stream_due = current_time - last_retrieve_time >= frame_interval
                 
-                # Store frame reference for screenshot use
-                self._last_frame = frame
+                # Skip decoding frames nobody is going to look at
+                if not (stream_due or write_due):
+                    continue
+                
+                success, frame = camera.retrieve()
+                if not success:
+                    print(f"Failed to retrieve frame {frame_count}")
+                    continue
+                if stream_due:
+                    last_retrieve_time = current_time
+                
+                # A raw MJPEG buffer comes back as a single row of bytes; keep it as-is
+                # and only decode to BGR when the recorder needs pixels right now
+                jpeg = None
+                if frame.ndim == 2 and frame.shape[0] == 1:
+                    jpeg = frame.reshape(-1)
+                    frame = cv2.imdecode(jpeg, cv2.IMREAD_COLOR) if write_due else None
+                
+                with self._frame_ready:
+                    self._last_frame = frame
+                    self._last_jpeg = jpeg
+                    self._last_gray = None
+                    self._frame_seq += 1
+                    self._frame_ready.notify_all()
                 
                 # Write frame to video if recording
-                if robot_state.is_recording_video and self._video_writer is not None:
-                    self._video_writer.write(frame)
+                if write_due and frame is not None:
+                    with self._writer_lock:
+                        if self._video_writer is not None:
+                            self._video_writer.write(frame)
+                    
+                    next_write_time += write_interval
+                    if next_write_time < current_time:
+                        # Fell behind (or just started) - resync instead of bursting
+                        next_write_time = current_time + write_interval
+            
+            print(f"Camera capture ended after {frame_count} frames")
+            
+        except Exception as e:
+            print(f"Camera capture error: {e}")
+        finally:
+            robot_state.camera_active = False
+            # The capture thread is the only reader, so once it exits nobody needs the device
+            self._release_camera()
+            # Wake any stream waiting on a frame so it can notice we stopped
+            with self._frame_ready:
+                self._frame_ready.notify_all()
+    
+    def _latest_bgr_locked(self) -> Optional[np.ndarray]:
+        """Latest frame as BGR, decoding native MJPEG once - caller holds _frame_ready"""
+        if self._last_frame is None and self._last_jpeg is not None:
+            self._last_frame = cv2.imdecode(self._last_jpeg, cv2.IMREAD_COLOR)
+        return self._last_frame
+    
+    def _latest_gray_locked(self) -> Optional[np.ndarray]:
+        """Latest frame as grayscale, converting once - caller holds _frame_ready"""
+        if self._last_gray is None:
+            if self._last_frame is not None:
+                self._last_gray = cv2.cvtColor(self._last_frame, cv2.COLOR_BGR2GRAY)
+            elif self._last_jpeg is not None:
+                # Luma decodes straight out of the JPEG without building BGR first
+                self._last_gray = cv2.imdecode(self._last_jpeg, cv2.IMREAD_GRAYSCALE)
+        return self._last_gray
+    
+    def read_latest(self) -> Optional[np.ndarray]:
+        """Get the most recent frame as BGR, decoding native MJPEG on demand"""
+        with self._frame_ready:
+            return self._latest_bgr_locked()
+    
+    def read_latest_gray(self) -> Optional[np.ndarray]:
+        """Get the most recent frame as grayscale, shared by every detector call on that frame"""
+        with self._frame_ready:
+            return self._latest_gray_locked()
+    
+    def read_latest_pair(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Get the most recent frame as (BGR, grayscale), both views of the same frame"""
+        with self._frame_ready:
+            return self._latest_bgr_locked(), self._latest_gray_locked()
+    
+    @staticmethod
+    def _stream_jpeg(jpeg: Optional[np.ndarray], frame: Optional[np.ndarray]) -> Optional[bytes]:
+        """JPEG bytes for the stream, encoding only if the camera gave us BGR"""
+        if jpeg is not None:
+            return jpeg.tobytes()
+        if frame is None:
+            return None
+        
+        ret, buffer = cv2.imencode('.jpg', frame, STREAM_JPEG_PARAMS)
+        return buffer.tobytes() if ret else None
+    
+    def read_latest_jpeg(self) -> Optional[bytes]:
+        """Get the most recent frame as JPEG bytes, encoding only if the camera gave us BGR"""
+        with self._frame_ready:
+            jpeg = self._last_jpeg
+            frame = self._last_frame
+        
+        return self._stream_jpeg(jpeg, frame)
+    
+    def read_latest_part(self) -> Optional[bytes]:
+        """Get the most recent frame as a framed MJPEG part, built at most once per frame"""
+        with self._frame_ready:
+            if self._part_seq == self._frame_seq:
+                return self._last_part
+            seq = self._frame_seq
+            jpeg = self._last_jpeg
+            frame = self._last_frame
+        
+        frame_bytes = self._stream_jpeg(jpeg, frame)
+        if frame_bytes is None:
+            return None
+        
+        part = mjpeg_part(frame_bytes)
+        with self._frame_ready:
+            if seq > self._part_seq:
+                self._last_part = part
+                self._part_seq = seq
+        return part
+    
+    @property
+    def frame_seq(self) -> int:
+        """Sequence number of the most recently published frame"""
+        return self._frame_seq
+    
+    def wait_for_frame(self, last_seq: int, timeout: float = 1.0) -> int:
+        """Block until a frame newer than last_seq is published, returns the new seq"""
+        with self._frame_ready:
+            self._frame_ready.wait_for(
+                lambda: self._frame_seq != last_seq or not robot_state.camera_active,
+                timeout
+            )
+            return self._frame_seq
+    
+    def generate_frames(self) -> Generator[bytes, None, None]:
+        """Generate camera frames for streaming"""
+        # Every client attaches to the one capture thread instead of reading the
+        # device itself; the count decides when the camera can be released
+        with self._capture_lock:
+            if not self._start_capture():
+                print("Camera not available for streaming")
+                return
+            self._stream_clients += 1
+        print("Camera streaming started")
+        
+        # Limit streaming to STREAM_FPS for better performance
+        frame_interval = 1.0 / STREAM_FPS
+        last_frame_time = 0
+        frame_seq = 0
+        sent_count = 0
+        
+        try:
+            while robot_state.camera_active:
+                frame_seq = self.wait_for_frame(frame_seq)
                 
-                # Rate limiting - only send frames at target FPS
-                if current_time - last_frame_time >= frame_interval:
-                    try:
-                        # Encode frame for streaming with lower quality for speed
-                        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-                        if ret:
-                            frame_bytes = buffer.tobytes()
-                            yield (b'--frame\r\n'
-                                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-                            last_frame_time = current_time
-                        else:
-                            print(f"Failed to encode frame {frame_count}")
-                    except GeneratorExit:
-                        print("Client disconnected from video stream")
-                        break
-                    except Exception as e:
-                        print(f"Error yielding frame {frame_count}: {e}")
-                        break
+                current_time = time.monotonic()
+                if current_time - last_frame_time < frame_interval:
+                    continue
+                
+                # Every client yields the same shared part object, no per-client copies
+                part = self.read_latest_part()
+                if part is None:
+                    continue
                 
-                # Small delay to prevent CPU spinning
-                time.sleep(0.01)
+                yield part
+                last_frame_time = current_time
+                sent_count += 1
             
-            print(f"Camera streaming ended after {frame_count} frames")
+            print(f"Camera streaming ended after {sent_count} frames")
             
+        except GeneratorExit:
+            print("Client disconnected from video stream")
         except Exception as e:
             print(f"Camera streaming error: {e}")
         finally:
-            robot_state.camera_active = False
+            with self._capture_lock:
+                self._stream_clients -= 1
+                # Stop capturing once the last viewer is gone, unless we are recording;
+                # the capture thread releases the camera on its way out
+                if self._stream_clients == 0 and not robot_state.is_recording_video:
+                    robot_state.camera_active = False
     
-    def take_screenshot(self) -> Optional[str]:
-        """Take a screenshot using stored frame from video stream - NEVER touch camera directly"""
-        print("=== SCREENSHOT START ===")
-        print(f"robot_state.camera_active: {robot_state.camera_active}")
-        print(f"_last_frame is None: {self._last_frame is None}")
+    def take_screenshot_jpeg(self, quality: Optional[int] = None) -> Optional[bytes]:
+        """Take a screenshot as JPEG bytes using stored frame from video stream - NEVER touch camera directly
+        
+        quality overrides SCREENSHOT_JPEG_QUALITY when re-encoding; a native
+        MJPEG frame is returned as captured.
+        """
+        with self._frame_ready:
+            jpeg = self._last_jpeg
+            frame = self._last_frame
         
-        if self._last_frame is None:
+        # A native MJPEG frame is already a complete JPEG file
+        if jpeg is not None:
+            return jpeg.tobytes()
+        
+        if frame is None:
             print("No frame available for screenshot - video stream not active")
             return None
         
         try:
-            print("Encoding stored frame for screenshot (NOT touching camera)")
-            # Create a copy of the frame to be completely safe
-            frame_copy = self._last_frame.copy()
-            
-            # Encode the copied frame
-            success, buffer = cv2.imencode('.jpg', frame_copy, [cv2.IMWRITE_JPEG_QUALITY, 90])
+            # The published frame is never written to, so it can be encoded in place
+            params = SCREENSHOT_JPEG_PARAMS if quality is None else jpeg_params(quality)
+            success, buffer = cv2.imencode('.jpg', frame, params)
             if not success:
                 print("Failed to encode frame")
                 return None
             
-            print("Screenshot encoded successfully")
-            print(f"robot_state.camera_active after screenshot: {robot_state.camera_active}")
-            print("=== SCREENSHOT END ===")
-            return f'data:image/jpeg;base64,{base64.b64encode(buffer).decode("utf-8")}'
+            return buffer.tobytes()
         except Exception as e:
             print(f"Screenshot failed with error: {e}")
-            print("=== SCREENSHOT END (ERROR) ===")
             return None
     
+    def take_screenshot(self) -> Optional[str]:
+        """Take a screenshot as a base64 data URL"""
+        jpeg = self.take_screenshot_jpeg()
+        if jpeg is None:
+            return None
+        
+        return f'data:image/jpeg;base64,{base64.b64encode(jpeg).decode("ascii")}'
+    
     def start_video_recording(self) -> Optional[str]:
         """Start video recording, returns filename if successful"""
         if robot_state.is_recording_video:
             return None
         
-        camera = self.init_camera()
-        if not camera:
-            return None
+        # Frames are written by the capture thread, so make sure it is running
+        with self._capture_lock:
+            if not self._start_capture():
+                return None
         
         try:
             # Create filename with timestamp
@@ -224,9 +480,15 @@ class CameraService:
         robot_state.set_video_recording_state(False)
         
         try:
-            if self._video_writer is not None:
-                self._video_writer.release()
-                self._video_writer = None
+            with self._writer_lock:
+                if self._video_writer is not None:
+                    self._video_writer.release()
+                    self._video_writer = None
+            
+            # Recording kept capture alive after the last viewer left; release it now
+            with self._capture_lock:
+                if self._stream_clients == 0:
+                    robot_state.camera_active = False
             
             print(f"Video recording stopped: {filename}")
             return filename
@@ -2,10 +2,10 @@
 import json
 import os
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional, Set
 
-from ..utils.config import POSITIONS_FILE, CONFIG_FILE
-from ..utils.validation import validate_position_name
+from ..utils.config import POSITIONS_FILE, CONFIG_FILE, ANGLE_LIMITS
+from ..utils.validation import validate_position_name, clamp_angles
 
 class PositionService:
     """Manages saved robot positions"""
@@ -73,8 +73,6 @@ class PositionService:
             raise ValueError("All angles must be numbers")
         
         # Clamp angles to limits
-        from ..utils.config import ANGLE_LIMITS
-        from ..utils.validation import clamp_angles
         safe_angles = clamp_angles(angles, ANGLE_LIMITS)
         
         # Save position
@@ -106,6 +104,11 @@ class PositionService:
         """Get a specific position"""
         return self._saved_positions.get(name)
     
+    def get_positions(self, names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the saved positions for names in one call, skipping unknown names"""
+        return {name: self._saved_positions[name] for name in set(names)
+                if name in self._saved_positions}
+    
     def update_position_config(self, name: str, enabled: bool) -> bool:
         """Update position configuration"""
         if name not in self._saved_positions:
@@ -127,6 +130,10 @@ class PositionService:
         """Check if position exists"""
         return name in self._saved_positions
     
+    def missing_positions(self, names: Iterable[str]) -> Set[str]:
+        """Return the names that are not saved positions, checked in one pass"""
+        return set(names).difference(self._saved_positions)
+    
     def get_position_count(self) -> int:
         """Get number of saved positions"""
         return len(self._saved_positions)
@@ -7,6 +7,32 @@ from typing import Dict, List, Any, Optional
 from ..utils.config import PROCEDURES_FILE
 from ..utils.validation import validate_position_name
 
+VALID_STEP_TYPES = frozenset({'position', 'delay'})
+
+def validate_steps(steps: List[Dict[str, Any]]):
+    """Check the structure of procedure steps, raising ValueError on the first bad step"""
+    if not isinstance(steps, list) or len(steps) == 0:
+        raise ValueError("Steps must be a non-empty list")
+    
+    for i, step in enumerate(steps):
+        if not isinstance(step, dict):
+            raise ValueError(f"Step {i+1} must be an object")
+        
+        step_type = step.get('type')
+        if not isinstance(step_type, str) or step_type not in VALID_STEP_TYPES:
+            raise ValueError(f"Step {i+1}: Invalid type '{step_type}'. Must be 'position' or 'delay'")
+        
+        if 'data' not in step:
+            raise ValueError(f"Step {i+1}: Missing 'data' field")
+        
+        if step_type == 'position' and not isinstance(step['data'], str):
+            raise ValueError(f"Step {i+1}: Position data must be a string")
+        
+        if step_type == 'delay':
+            delay = step['data']
+            if not isinstance(delay, (int, float)) or delay <= 0:
+                raise ValueError(f"Step {i+1}: Delay must be a positive number")
+
 class ProcedureService:
     """Manages saved robot procedures (sequences of positions)"""
     
@@ -61,28 +87,7 @@ class ProcedureService:
         if name in self._saved_procedures:
             raise ValueError(f'Procedure "{name}" already exists')
         
-        # Validate steps
-        if not isinstance(steps, list) or len(steps) == 0:
-            raise ValueError("Steps must be a non-empty list")
-        
-        for i, step in enumerate(steps):
-            if not isinstance(step, dict):
-                raise ValueError(f"Step {i+1} must be an object")
-            
-            step_type = step.get('type')
-            if step_type not in ['position', 'delay']:
-                raise ValueError(f"Step {i+1}: Invalid type '{step_type}'. Must be 'position' or 'delay'")
-            
-            if 'data' not in step:
-                raise ValueError(f"Step {i+1}: Missing 'data' field")
-            
-            if step_type == 'position' and not isinstance(step['data'], str):
-                raise ValueError(f"Step {i+1}: Position data must be a string")
-            
-            if step_type == 'delay':
-                delay = step['data']
-                if not isinstance(delay, (int, float)) or delay <= 0:
-                    raise ValueError(f"Step {i+1}: Delay must be a positive number")
+        validate_steps(steps)
         
         # Save procedure
         self._saved_procedures[name] = {
@@ -121,28 +126,7 @@ class ProcedureService:
         if name not in self._saved_procedures:
             raise ValueError(f'Procedure "{name}" not found')
         
-        # Validate steps (same validation as save_procedure)
-        if not isinstance(steps, list) or len(steps) == 0:
-            raise ValueError("Steps must be a non-empty list")
-        
-        for i, step in enumerate(steps):
-            if not isinstance(step, dict):
-                raise ValueError(f"Step {i+1} must be an object")
-            
-            step_type = step.get('type')
-            if step_type not in ['position', 'delay']:
-                raise ValueError(f"Step {i+1}: Invalid type '{step_type}'. Must be 'position' or 'delay'")
-            
-            if 'data' not in step:
-                raise ValueError(f"Step {i+1}: Missing 'data' field")
-            
-            if step_type == 'position' and not isinstance(step['data'], str):
-                raise ValueError(f"Step {i+1}: Position data must be a string")
-            
-            if step_type == 'delay':
-                delay = step['data']
-                if not isinstance(delay, (int, float)) or delay <= 0:
-                    raise ValueError(f"Step {i+1}: Delay must be a positive number")
+        validate_steps(steps)
         
         # Update procedure (preserve original created date)
         original_created = self._saved_procedures[name].get('created', time.strftime('%Y-%m-%d %H:%M:%S'))
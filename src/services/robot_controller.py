@@ -1,11 +1,12 @@
 """Robot hardware controller - abstraction layer for MyCobot320"""
+import os
 import time
 import threading
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from pymycobot import MyCobot320
 
 from ..models.robot_state import robot_state
-from ..utils.config import ROBOT_PORT, ROBOT_BAUDRATE, HOME_POSITION, EXTEND_POSITION, ANGLE_LIMITS
+from ..utils.config import ROBOT_PORT, ROBOT_BAUDRATE, HOME_POSITION, EXTEND_POSITION, ANGLE_LIMITS, ANGLE_CACHE_TTL, ROBOT_LOW_LATENCY, JOG_FLUSH_INTERVAL
 from ..utils.validation import clamp_angles, validate_angles_array
 # Removed kinematics import - using MyCobot library directly
 
@@ -15,22 +16,57 @@ class RobotController:
     def __init__(self):
         self._mc: Optional[MyCobot320] = None
         self._connection_lock = threading.Lock()
+        # Last angles read over serial, shared between concurrent status requests
+        self._angle_cache: Optional[List[float]] = None
+        self._angle_cache_time = 0.0
+        # Latest-only jog target, flushed to the serial port by the jog writer thread
+        self._jog_ready = threading.Condition()
+        self._pending_jog: Optional[Tuple[List[float], int]] = None
+        # Bumped by every direct move; a jog taken under an older generation is
+        # stale and dropped at write time instead of overtaking the direct move
+        self._move_generation = 0
         self._init_robot()
+        threading.Thread(target=self._jog_writer_loop, daemon=True).start()
     
     def _init_robot(self):
         """Initialize robot connection"""
         try:
             self._mc = MyCobot320(ROBOT_PORT, ROBOT_BAUDRATE)
             print(f"Robot initialized on {ROBOT_PORT} at {ROBOT_BAUDRATE} baud")
+            if ROBOT_LOW_LATENCY:
+                self._enable_low_latency()
         except Exception as e:
             print(f"Failed to initialize robot: {e}")
             self._mc = None
     
+    def _enable_low_latency(self):
+        """Set ASYNC_LOW_LATENCY on the tty so replies aren't held in the kernel buffer"""
+        serial_port = getattr(self._mc, '_serial_port', None)
+        if serial_port is None or not hasattr(serial_port, 'set_low_latency_mode'):
+            print("Low-latency serial mode not supported on this platform")
+            return
+        
+        try:
+            serial_port.set_low_latency_mode(True)
+            print(f"Low-latency serial mode enabled on {ROBOT_PORT}")
+        except (IOError, ValueError) as e:
+            print(f"Failed to enable low-latency serial mode: {e}")
+        
+        # USB-serial adapters also hold replies for latency_timer ms (16 by default)
+        timer_path = f"/sys/bus/usb-serial/devices/{os.path.basename(ROBOT_PORT)}/latency_timer"
+        if os.path.exists(timer_path):
+            try:
+                with open(timer_path, 'w') as f:
+                    f.write('1')
+                print(f"USB latency timer set to 1ms on {ROBOT_PORT}")
+            except OSError as e:
+                print(f"Failed to lower USB latency timer: {e}")
+    
     def is_connected(self) -> bool:
         """Check if robot is connected"""
         return self._mc is not None
     
-    def ensure_powered(self) -> bool:
+    def ensure_powered(self, timeout: float = 1.0) -> bool:
         """Ensure robot is powered on"""
         if not self.is_connected():
             return False
@@ -38,13 +74,27 @@ class RobotController:
         try:
             if not robot_state.robot_powered:
                 self._mc.power_on()
-                time.sleep(0.5)  # Give time for power up
+                self._wait_for_power_on(timeout)
                 robot_state.set_power_state(True)
             return True
         except Exception as e:
             print(f"Failed to power on robot: {e}")
             return False
     
+    def _wait_for_power_on(self, timeout: float):
+        """Poll the controller until it reports power on, rather than sleeping a fixed time"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with self._connection_lock:
+                    if self._mc.is_power_on() == 1:
+                        return
+            except Exception:
+                pass
+            time.sleep(0.02)
+        
+        print(f"Robot did not report power on within {timeout}s, continuing anyway")
+    
     def _solve_ik_safe(self, target_coords: List[float]) -> Optional[List[float]]:
         """Safe IK solver with validation and garbage detection"""
         if not self.is_connected():
@@ -107,7 +157,9 @@ class RobotController:
             return False
         
         try:
-            self._mc.power_off()
+            with self._connection_lock:
+                self._mc.power_off()
+                self._angle_cache = None
             robot_state.set_power_state(False)
             robot_state.set_manual_control(False)
             return True
@@ -115,19 +167,29 @@ class RobotController:
             print(f"Failed to power off robot: {e}")
             return False
     
-    def get_angles(self) -> Optional[List[float]]:
-        """Get current joint angles from robot"""
+    def get_angles(self, max_age: float = ANGLE_CACHE_TTL) -> Optional[List[float]]:
+        """Get current joint angles from robot
+        
+        A reading younger than max_age seconds is reused instead of doing another
+        serial round-trip; pass max_age=0 to force a fresh read.
+        """
         if not self.is_connected():
             return None
         
         try:
             with self._connection_lock:
+                if self._angle_cache is not None and time.monotonic() - self._angle_cache_time < max_age:
+                    return self._angle_cache.copy()
+                
                 angles = self._mc.get_angles()
                 # Check if we got a valid list of angles
                 if angles is None or not isinstance(angles, list) or len(angles) != 6:
                     print(f"Invalid angles received: {angles}")
                     return None
-                return angles
+                
+                self._angle_cache = angles
+                self._angle_cache_time = time.monotonic()
+                return angles.copy()
         except Exception as e:
             print(f"Failed to get angles: {e}")
             return None
@@ -142,18 +204,15 @@ class RobotController:
         
         try:
             # Clamp angles to limits
-            from ..utils.config import ANGLE_LIMITS
             safe_angles = clamp_angles(angles, ANGLE_LIMITS)
             
-            # Debug flag to disable robot movement for safety testing
-            import os
-            DEBUG_DISABLE_MOVEMENT = os.getenv('DEBUG_DISABLE_MOVEMENT', 'False').lower() == 'true'
+            # A direct move supersedes any jog target still waiting to be flushed,
+            # including one the jog writer has already taken but not yet written
+            with self._jog_ready:
+                self._pending_jog = None
+                self._move_generation += 1
             
-            if DEBUG_DISABLE_MOVEMENT:
-                print(f"DEBUG: WOULD SEND ANGLES TO ROBOT: {safe_angles} at speed {speed}")
-            else:
-                with self._connection_lock:
-                    self._mc.send_angles(safe_angles, speed)
+            self._write_angles(safe_angles, speed)
             
             robot_state.update_ideal_angles(safe_angles)
             return True
@@ -161,6 +220,83 @@ class RobotController:
             print(f"Failed to send angles: {e}")
             return False
     
+    def _write_angles(self, safe_angles: List[float], speed: int, generation: Optional[int] = None):
+        """Write already-clamped angles to the serial port
+        
+        A jog passes the move generation it was taken under and is skipped if a
+        direct move has been issued since.
+        """
+        # Debug flag to disable robot movement for safety testing
+        DEBUG_DISABLE_MOVEMENT = os.getenv('DEBUG_DISABLE_MOVEMENT', 'False').lower() == 'true'
+        
+        if DEBUG_DISABLE_MOVEMENT:
+            if generation is None or generation == self._move_generation:
+                print(f"DEBUG: WOULD SEND ANGLES TO ROBOT: {safe_angles} at speed {speed}")
+        else:
+            with self._connection_lock:
+                # Checked under the serial lock, so a direct move that bumped the
+                # generation before reaching the port is never followed by this jog
+                if generation is not None and generation != self._move_generation:
+                    return
+                self._mc.send_angles(safe_angles, speed)
+                # The robot is now moving, so the cached reading no longer reflects it
+                self._angle_cache = None
+    
+    def queue_jog_angles(self, angles: List[float], speed: int = 50) -> bool:
+        """Queue angles for the jog writer - rapid updates coalesce so only the latest is sent"""
+        if not self.is_connected():
+            return False
+        
+        if not validate_angles_array(angles):
+            return False
+        
+        safe_angles = clamp_angles(angles, ANGLE_LIMITS)
+        robot_state.update_ideal_angles(safe_angles)
+        
+        with self._jog_ready:
+            self._pending_jog = (safe_angles, speed)
+            self._jog_ready.notify()
+        return True
+    
+    def _jog_writer_loop(self):
+        """Jog writer thread body - sends at most one jog command per JOG_FLUSH_INTERVAL"""
+        while True:
+            with self._jog_ready:
+                self._jog_ready.wait_for(lambda: self._pending_jog is not None)
+                safe_angles, speed = self._pending_jog
+                self._pending_jog = None
+                generation = self._move_generation
+            
+            try:
+                self._write_angles(safe_angles, speed, generation)
+            except Exception as e:
+                print(f"Failed to send jog angles: {e}")
+            
+            time.sleep(JOG_FLUSH_INTERVAL)
+    
+    def wait_until_reached(self, target: List[float], timeout: float = 5.0,
+                           tolerance: float = 1.5, cancel: Optional[threading.Event] = None) -> bool:
+        """Poll joint angles until the robot is within tolerance (degrees) of target
+        
+        Returns early (False) as soon as the optional cancel event is set.
+        """
+        if not self.is_connected():
+            return False
+        
+        target = clamp_angles(target, ANGLE_LIMITS)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            angles = self.get_angles(max_age=0)
+            if angles is not None and max(abs(a - t) for a, t in zip(angles, target)) < tolerance:
+                return True
+            if cancel is not None:
+                if cancel.wait(0.01):
+                    return False
+            else:
+                time.sleep(0.01)
+        
+        return False
+    
     def move_to_home(self) -> bool:
         """Move robot to home position"""
         if not self.ensure_powered():
@@ -178,7 +314,7 @@ class RobotController:
         
         success = self.send_angles(HOME_POSITION, 100)
         if success:
-            time.sleep(6)  # Allow movement to complete
+            self.wait_until_reached(HOME_POSITION, timeout=6)
             robot_state.update_ideal_angles(HOME_POSITION)
             robot_state.set_manual_control(False)
             print(f"DEBUG: Home move completed - unified state updated")
@@ -197,7 +333,7 @@ class RobotController:
         
         success = self.send_angles(EXTEND_POSITION, 100)
         if success:
-            time.sleep(4)  # Allow movement to complete
+            self.wait_until_reached(EXTEND_POSITION, timeout=4)
             robot_state.update_ideal_angles(EXTEND_POSITION)
             robot_state.set_manual_control(False)
             print(f"DEBUG: Extend move completed - unified state updated")
@@ -219,11 +355,11 @@ class RobotController:
                 robot_state.update_ideal_angles(current_angles)
         
         robot_state.set_manual_control(True)
-        robot_state.update_joint_angle(joint_id, angle)
+        target_angles = robot_state.update_joint_angle(joint_id, angle)
         
-        # Send updated angles to robot
-        target_angles = robot_state.get_ideal_angles()
-        return self.send_angles(target_angles, speed)
+        # Queue updated angles - slider drags arrive faster than the serial link
+        # can usefully take them, so intermediate targets are dropped
+        return self.queue_jog_angles(target_angles, speed)
     
     def get_current_status(self) -> dict:
         """Get current robot status"""
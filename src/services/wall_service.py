@@ -16,6 +16,8 @@ class WallService:
     def __init__(self, calibration_file: str = 'wall_calibrations.json'):
         self.calibration_file = Path(calibration_file)
         self.calibrations = self._load_calibrations()
+        # Bumped whenever calibrations are written, used as the HTTP ETag for reads
+        self.version = 0
     
     def _load_calibrations(self) -> Dict[str, Dict[str, Any]]:
         """Load wall calibrations from file"""
@@ -31,6 +33,7 @@ class WallService:
     
     def _save_calibrations(self):
         """Save wall calibrations to file"""
+        self.version += 1
         try:
             with open(self.calibration_file, 'w') as f:
                 json.dump(self.calibrations, f, indent=2)
@@ -77,7 +80,7 @@ class WallService:
         Calculate best-fit plane using least squares method
         
         Args:
-            positions: List of 3D positions [[x, y, z], ...]
+            positions: List of 3D positions [[x, y, z], ...] or an (N, 3) array
             
         Returns:
             Tuple of (plane_dict, fit_error)
@@ -86,8 +89,8 @@ class WallService:
         if len(positions) < 3:
             raise ValueError("At least 3 points required for plane fitting")
         
-        # Convert to numpy array
-        points = np.array(positions, dtype=float)
+        # Convert to numpy array (no copy if the caller already passed one)
+        points = np.asarray(positions, dtype=float)
         
         # Center the points around their centroid
         centroid = np.mean(points, axis=0)
@@ -95,7 +98,8 @@ class WallService:
         
         # Perform SVD to find the best-fit plane
         # The plane normal is the right singular vector corresponding to the smallest singular value
-        _, _, vh = np.linalg.svd(centered_points)
+        # full_matrices=False skips building the N x N U matrix we never use
+        _, _, vh = np.linalg.svd(centered_points, full_matrices=False)
         normal = vh[-1]  # Last row of V^T is the normal vector
         
         # Ensure normal points in a consistent direction (e.g., positive Z if possible)
@@ -109,13 +113,9 @@ class WallService:
         plane_equation = [float(normal[0]), float(normal[1]), float(normal[2]), float(D)]
         
         # Calculate fit error (RMS distance from points to plane)
-        distances = []
-        for point in points:
-            # Distance from point to plane: |ax + by + cz + d| / sqrt(a² + b² + c²)
-            dist = abs(np.dot(normal, point) + D) / np.linalg.norm(normal)
-            distances.append(dist)
-        
-        fit_error = float(np.sqrt(np.mean(np.array(distances)**2)))
+        # normal is a unit vector, so each distance is just |normal · (P - centroid)|
+        distances = centered_points @ normal
+        fit_error = float(np.sqrt(np.mean(distances**2)))
         
         plane_dict = {
             'normal': normal.tolist(),
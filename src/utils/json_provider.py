@@ -0,0 +1,46 @@
+"""Fast JSON encoding for Flask responses
+
+Uses orjson when it is installed and falls back to Flask's stdlib-based
+provider otherwise. orjson serializes float lists (joint angles, camera
+matrices) several times faster and handles NumPy arrays natively; the
+fallback converts them itself, so services can hand arrays straight to
+jsonify either way.
+"""
+from typing import Any, Union
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+class NumpyJSONProvider(DefaultJSONProvider):
+    """Stdlib JSON provider that also serializes NumPy arrays and scalars"""
+    
+    @staticmethod
+    def default(o: Any) -> Any:
+        """Convert NumPy values to plain Python, defer everything else to Flask"""
+        if isinstance(o, (np.ndarray, np.generic)):
+            return o.tolist()
+        return DefaultJSONProvider.default(o)
+
+class OrjsonProvider(NumpyJSONProvider):
+    """JSON provider backed by orjson, matching the default provider's output"""
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize obj to a JSON string - formatting kwargs are ignored"""
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        """Deserialize JSON from a string or bytes"""
+        return orjson.loads(s)
+
+def init_json_provider(app):
+    """Install the orjson provider on app if orjson is available, the NumPy-aware stdlib one otherwise"""
+    app.json = OrjsonProvider(app) if ORJSON_AVAILABLE else NumpyJSONProvider(app)
@@ -0,0 +1,27 @@
+"""Compiled numeric helpers for joint-space math
+
+Functions are JIT-compiled with Numba when it is installed (cached on disk so
+only the first run pays the compile cost) and fall back to plain Python/NumPy
+otherwise. All arrays are float64 with one entry per joint.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+@njit(cache=True, fastmath=True)
+def clamp6(angles: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """Clamp each joint angle to its [lower, upper] limit"""
+    out = np.empty(angles.shape[0], np.float64)
+    for i in range(angles.shape[0]):
+        out[i] = min(max(angles[i], lower[i]), upper[i])
+    return out
@@ -1,16 +1,36 @@
 """Input validation utilities"""
 from typing import List, Tuple, Optional
 
-def clamp_angles(angles: List[float], limits: List[Tuple[float, float]]) -> List[float]:
+import numpy as np
+
+from .config import ANGLE_LIMITS
+from .kinematics import clamp6, NUMBA_AVAILABLE
+
+# Joint limits as lower/upper bound arrays, built once for np.clip
+ANGLE_MIN, ANGLE_MAX = np.array(ANGLE_LIMITS, dtype=np.float64).T
+# Same bounds as plain floats for scalar clamps, comparing against numpy scalars is slower
+_JOINT_BOUNDS = list(zip(ANGLE_MIN.tolist(), ANGLE_MAX.tolist()))
+
+def clamp_angles(angles: List[float], limits: List[Tuple[float, float]] = ANGLE_LIMITS) -> List[float]:
     """Clamp angles to their respective joint limits"""
-    clamped = []
-    for i, angle in enumerate(angles):
-        if i < len(limits):
-            min_a, max_a = limits[i]
-            clamped.append(max(min(angle, max_a), min_a))
-        else:
-            clamped.append(angle)
-    return clamped
+    if limits is ANGLE_LIMITS:
+        lower, upper = ANGLE_MIN, ANGLE_MAX
+    else:
+        lower, upper = np.array(limits, dtype=np.float64).reshape(-1, 2).T
+    
+    # Angles beyond the number of limits are passed through unchanged
+    n = min(len(angles), len(lower))
+    values = np.asarray(angles[:n], dtype=np.float64)
+    if NUMBA_AVAILABLE:
+        clamped = clamp6(values, lower[:n], upper[:n]).tolist()
+    else:
+        clamped = np.clip(values, lower[:n], upper[:n]).tolist()
+    return clamped + list(angles[n:])
+
+def clamp_joint_angle(joint_id: int, angle: float) -> float:
+    """Clamp a single joint angle to its limits"""
+    lower, upper = _JOINT_BOUNDS[joint_id]
+    return float(min(max(angle, lower), upper))
 
 def validate_joint_id(joint_id: int) -> bool:
     """Validate joint ID is in valid range (0-5)"""
@@ -29,7 +49,7 @@ def validate_angle(angle: float, joint_id: int, limits: List[Tuple[float, float]
 
 def validate_angles_array(angles: List[float]) -> bool:
     """Validate angles array has correct length and types"""
-    if not isinstance(angles, list):
+    if not isinstance(angles, (list, tuple)):
         return False
     
     if len(angles) != 6:
@@ -154,22 +154,18 @@ class CameraController {
             // Show immediate feedback
             MessageHandler.show('Taking screenshot...', 'success');
             
-            const response = await fetch('/api/camera/screenshot', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                }
-            });
-            const data = await response.json();
+            const response = await fetch('/api/camera/screenshot.jpg');
             
-            if (data.success) {
+            if (response.ok) {
                 // Create download link
+                const url = URL.createObjectURL(await response.blob());
                 const link = document.createElement('a');
-                link.href = data.image;
+                link.href = url;
                 link.download = `screenshot_${new Date().toISOString().replace(/[:.]/g, '-')}.jpg`;
                 document.body.appendChild(link);
                 link.click();
                 document.body.removeChild(link);
+                URL.revokeObjectURL(url);
                 
                 // Add small delay before refreshing to allow screenshot processing to complete
                 setTimeout(() => {
@@ -178,6 +174,7 @@ class CameraController {
                 
                 MessageHandler.show('Screenshot captured and downloaded!', 'success');
             } else {
+                const data = await response.json();
                 MessageHandler.show('Screenshot failed: ' + data.message, 'error');
             }
         } catch (error) {
@@ -145,9 +145,13 @@ document.addEventListener('DOMContentLoaded', function() {
         window.cameraController = new CameraController();
     }
     
-    // Start status updates
+    // Status is pushed over Socket.IO on every state change; only poll
+    // the REST endpoint while the socket is down
     setInterval(() => {
-        window.socketManager.requestStatus();
+        const socket = window.socketManager.socket;
+        if (!socket || !socket.connected) {
+            window.socketManager.requestStatus();
+        }
     }, 2000);
 });
 
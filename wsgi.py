@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for running the MyCobot320 Web Controller under a production server
+
+Usage:
+    gunicorn -w 1 --threads 32 --bind 0.0.0.0:5000 wsgi:application
+
+SocketIO keeps per-client state in memory, so run exactly one worker; the
+threaded worker matches the 'threading' SocketIO async mode.
+"""
+
+import sys
+import os
+
+# Add src directory to Python path
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+sys.path.insert(0, src_path)
+
+from src.main import create_app
+
+app, socketio = create_app()
+application = app